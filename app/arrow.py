@@ -0,0 +1,88 @@
+import io
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, `uv sync --extra arrow`
+    pa = pq = None
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+PARQUET = 'application/vnd.apache.parquet'
+JSON = 'application/json'
+
+
+def negotiate(accept: str | None) -> str | None:
+    """arrow or parquet media type when Accept prefers one over json, else None
+
+    Only an explicit arrow/parquet type wins, */* and missing headers keep json.
+    """
+    if not accept:
+        return None
+    best, best_q = None, 0.0
+    for part in accept.split(','):
+        media_type, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type in (ARROW_STREAM, PARQUET, JSON) and q > best_q:
+            best, best_q = media_type, q
+    if best in (ARROW_STREAM, PARQUET):
+        if pa is None:
+            raise HTTPException(status_code=406, detail="pyarrow is not installed, only application/json is available")
+        return best
+    return None
+
+
+def table_response(table: "pa.Table", media_type: str) -> Response:
+    sink = io.BytesIO()
+    if media_type == PARQUET:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return Response(sink.getvalue(), media_type=media_type)
+
+
+def _column(values: list, length: int) -> "pa.Array":
+    # '-' is how the json responses spell a missing value
+    values = [None if v == '-' else v for v in values]
+    values += [None] * (length - len(values))
+    if any(v is not None for v in values) and all(v is None or isinstance(v, int) for v in values):
+        return pa.array(values, type=pa.int64())
+    return pa.array(values, type=pa.float64())
+
+
+def dataset_table(columns: list[list], dimensions: list[str]) -> "pa.Table":
+    """echarts dataset columns as a table, the first column is the year"""
+    years = pa.array(columns[0], type=pa.int32())
+    arrays = [years] + [_column(values, len(years)) for values in columns[1:]]
+    return pa.Table.from_arrays(arrays, names=list(dimensions))
+
+
+def links_table(nodes: list[str], years: list[int], source, target, year_index, values) -> "pa.Table":
+    """force graph links in long form, one row per (year, source, target)
+
+    source/target are node ids, the *_name columns are dictionary encoded over
+    the node names (categoricals in pandas); the node list is also kept in the
+    schema metadata.
+    """
+    names = pa.array(nodes, type=pa.string())
+    source = pa.array(source, type=pa.int32())
+    target = pa.array(target, type=pa.int32())
+    table = pa.Table.from_arrays([
+        pa.array(years, type=pa.int32()).take(pa.array(year_index)),
+        source,
+        target,
+        pa.DictionaryArray.from_arrays(source, names),
+        pa.DictionaryArray.from_arrays(target, names),
+        pa.array(values, type=pa.float64()),
+    ], names=['year', 'source', 'target', 'source_name', 'target_name', 'value'])
+    return table.replace_schema_metadata({'nodes': json.dumps(nodes, ensure_ascii=False)})
@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from inspect import iscoroutinefunction
+
+# every cache created by @cached, by name, for the stats endpoints
+registry: dict[str, "Cache"] = {}
+
+
+class Cache:
+    """size and ttl bounded LRU store with hit/miss/eviction counters"""
+    def __init__(self, name: str, maxsize: int, ttl: float | None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()  # key -> (expires at, value)
+        self.inflight = {}  # key -> pending call shared by concurrent misses
+        self.lock = threading.Lock()
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key) -> tuple[bool, object]:
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                self.counters['misses'] += 1
+                return False, None
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self.data[key]
+                self.counters['expirations'] += 1
+                self.counters['misses'] += 1
+                return False, None
+            self.data.move_to_end(key)
+            self.counters['hits'] += 1
+            return True, value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self.data[key] = (expires, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate(self, key) -> bool:
+        with self.lock:
+            if self.data.pop(key, None) is None:
+                return False
+            self.counters['invalidations'] += 1
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.counters['invalidations'] += len(self.data)
+            self.data.clear()
+
+    def lead(self, key) -> asyncio.Future:
+        """claim the async call for key, concurrent misses wait on the returned future"""
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        return future
+
+    def settle(self, key, future: asyncio.Future, value=None, error: BaseException | None = None, retry: bool = False):
+        """end a call claimed with lead: cache and hand out value, raise error in the waiters, or let them retry"""
+        del self.inflight[key]
+        if retry:
+            future.set_result(_RETRY)
+        elif error is not None:
+            future.set_exception(error)
+            # mark retrieved, nobody may be waiting
+            future.exception()
+        else:
+            self.set(key, value)
+            future.set_result(value)
+
+    async def join(self, key) -> tuple[bool, object]:
+        """(True, result) of the async call in flight for key, (False, None) when its leader was cancelled
+
+        A call that already ended gives the cached value, if it is still there.
+        """
+        future = self.inflight.get(key)
+        if future is None:
+            return self.get(key)
+        self.counters['coalesced'] += 1
+        value = await asyncio.shield(future)
+        if value is _RETRY:
+            return False, None
+        return True, value
+
+    def stats(self) -> dict:
+        return {
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'size': len(self.data),
+            **self.counters,
+        }
+
+
+class _Call:
+    """a sync call in flight, other threads wait for its result"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# result of an async call whose leader was cancelled, its waiters start over
+_RETRY = object()
+
+
+def _make_key(args, kwargs):
+    if kwargs:
+        return args + tuple(sorted(kwargs.items()))
+    return args
+
+
+def cached(maxsize: int = 128, ttl: float | None = None, name: str | None = None):
+    """lru_cache replacement for sync and async functions
+
+    Entries expire after `ttl` seconds (never when None). Concurrent misses on
+    the same arguments are coalesced: only the first call runs, the others wait
+    for its result or exception. When that first async call is cancelled the
+    waiters are not, one of them runs the function instead. The decorated
+    function gets `cache`, `cache_invalidate(*args, **kwargs)` and
+    `cache_clear()` attributes.
+    """
+    def decorator(func):
+        cache = Cache(name or f'{func.__module__}.{func.__qualname__}', maxsize, ttl)
+        registry[cache.name] = cache
+
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = _make_key(args, kwargs)
+                while True:
+                    found, value = cache.get(key)
+                    if found:
+                        return value
+                    if key not in cache.inflight:
+                        break
+                    found, value = await cache.join(key)
+                    if found:
+                        return value
+
+                future = cache.lead(key)
+                try:
+                    value = await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    cache.settle(key, future, retry=True)
+                    raise
+                except BaseException as e:
+                    cache.settle(key, future, error=e)
+                    raise
+                else:
+                    cache.settle(key, future, value)
+                    return value
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = _make_key(args, kwargs)
+                found, value = cache.get(key)
+                if found:
+                    return value
+                with cache.lock:
+                    call = cache.inflight.get(key)
+                    leader = call is None
+                    if leader:
+                        call = cache.inflight[key] = _Call()
+                if not leader:
+                    cache.counters['coalesced'] += 1
+                    call.event.wait()
+                    if call.error is not None:
+                        raise call.error
+                    return call.value
+
+                try:
+                    value = func(*args, **kwargs)
+                except Exception as e:
+                    call.error = e
+                    raise
+                else:
+                    cache.set(key, value)
+                    call.value = value
+                    return value
+                finally:
+                    with cache.lock:
+                        del cache.inflight[key]
+                    call.event.set()
+
+        wrapper.cache = cache
+        wrapper.cache_invalidate = lambda *args, **kwargs: cache.invalidate(_make_key(args, kwargs))
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
@@ -0,0 +1,320 @@
+import os
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+import pymongo
+from fastapi.concurrency import run_in_threadpool
+
+from app import config, snapshot
+
+# loaded graphs by language, filled in the app lifespan
+graphs: dict[str, "CategoryGraph"] = {}
+
+
+def _csr(src: np.ndarray, dst: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32)
+
+
+class CategoryGraph:
+    """category subcat DAG with integer node ids and CSR adjacency
+
+    Edges point from parent category to subcategory, the same direction as the
+    `subcat` relationship in neo4j. `up_*` holds the parents of every node and
+    `down_*` the children.
+    """
+    def __init__(self, page_ids, titles, f_titles, f_title_order, up_indptr, up_indices, down_indptr, down_indices):
+        self.page_ids = page_ids
+        self.titles = titles
+        self.f_titles = f_titles
+        self.f_title_order = f_title_order
+        self.up_indptr = up_indptr
+        self.up_indices = up_indices
+        self.down_indptr = down_indptr
+        self.down_indices = down_indices
+
+    @classmethod
+    def build(cls, categories, links):
+        """categories: (page_id, title, f_title) tuples, links: (from page_id, to title) subcat tuples"""
+        page_ids, titles, f_titles = array('q'), [], []
+        for page_id, title, f_title in categories:
+            page_ids.append(page_id)
+            titles.append(title)
+            f_titles.append(f_title)
+        id_index = {page_id: i for i, page_id in enumerate(page_ids)}
+        title_index = {title: i for i, title in enumerate(titles)}
+
+        children, parents = array('i'), array('i')
+        for from_id, to_title in links:
+            child = id_index.get(from_id)
+            parent = title_index.get(to_title)
+            if child is None or parent is None or child == parent:
+                continue
+            children.append(child)
+            parents.append(parent)
+
+        n = len(titles)
+        edges = np.unique(np.frombuffer(children, dtype=np.int32).astype(np.int64) * n + np.frombuffer(parents, dtype=np.int32))
+        children, parents = edges // max(n, 1), edges % max(n, 1)
+        up_indptr, up_indices = _csr(children, parents, n)
+        down_indptr, down_indices = _csr(parents, children, n)
+        f_title_order = np.array(sorted(range(n), key=f_titles.__getitem__), dtype=np.int32)
+        return cls(
+            np.frombuffer(page_ids, dtype=np.int64),
+            snapshot.StringTable.from_strings(titles),
+            snapshot.StringTable.from_strings(f_titles),
+            f_title_order,
+            up_indptr, up_indices, down_indptr, down_indices,
+        )
+
+    @classmethod
+    def build_from_mongo(cls, database, lang: str):
+        categories = (
+            (doc['_id'], doc['title'], doc.get('f_title') or doc['title'])
+            for doc in database[f'{lang}_page'].find({'namespace': 14}, {'title': 1, 'f_title': 1}, batch_size=10000)
+        )
+        links = (
+            (doc['from'], doc['to'])
+            for doc in database[f'{lang}_categorylinks'].find({'type': 'subcat'}, {'_id': 0, 'from': 1, 'to': 1}, batch_size=10000)
+        )
+        return cls.build(categories, links)
+
+    def save(self, path: str):
+        snapshot.save_arrays(
+            path,
+            {'nodes': len(self), 'edges': int(len(self.up_indices))},
+            page_ids=self.page_ids,
+            title_offsets=self.titles.offsets,
+            title_blob=self.titles.blob,
+            f_title_offsets=self.f_titles.offsets,
+            f_title_blob=self.f_titles.blob,
+            f_title_order=self.f_title_order,
+            up_indptr=self.up_indptr,
+            up_indices=self.up_indices,
+            down_indptr=self.down_indptr,
+            down_indices=self.down_indices,
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        _, arrays = snapshot.load_arrays(path, mmap)
+        return cls(
+            arrays['page_ids'],
+            snapshot.StringTable(arrays['title_offsets'], arrays['title_blob']),
+            snapshot.StringTable(arrays['f_title_offsets'], arrays['f_title_blob']),
+            arrays['f_title_order'],
+            arrays['up_indptr'], arrays['up_indices'],
+            arrays['down_indptr'], arrays['down_indices'],
+        )
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def find(self, f_title: str) -> int | None:
+        i = bisect_left(self.f_title_order, f_title, key=self.f_titles.__getitem__)
+        if i < len(self.f_title_order) and self.f_titles[self.f_title_order[i]] == f_title:
+            return int(self.f_title_order[i])
+        return None
+
+    def parents(self, v: int) -> list[int]:
+        return self.up_indices[self.up_indptr[v]:self.up_indptr[v + 1]].tolist()
+
+    def children(self, v: int) -> list[int]:
+        return self.down_indices[self.down_indptr[v]:self.down_indptr[v + 1]].tolist()
+
+    def neighbors(self, v: int) -> list[int]:
+        return self.parents(v) + self.children(v)
+
+    def _bidirectional_bfs(self, source: int, target: int, forward, backward, max_depth: int) -> list[int] | None:
+        """shortest path from source to target, forward/backward give the next nodes of each side"""
+        if source == target:
+            return [source]
+        prev, succ = {source: None}, {target: None}
+        dist_f, dist_b = {source: 0}, {target: 0}
+        front_f, front_b = [source], [target]
+        depth_f = depth_b = 0
+        while front_f and front_b and depth_f + depth_b < max_depth:
+            meets = []
+            if len(front_f) <= len(front_b):
+                depth_f += 1
+                next_front = []
+                for v in front_f:
+                    for w in forward(v):
+                        if w in prev:
+                            continue
+                        prev[w] = v
+                        dist_f[w] = depth_f
+                        next_front.append(w)
+                        if w in succ:
+                            meets.append(w)
+                front_f = next_front
+            else:
+                depth_b += 1
+                next_front = []
+                for v in front_b:
+                    for w in backward(v):
+                        if w in succ:
+                            continue
+                        succ[w] = v
+                        dist_b[w] = depth_b
+                        next_front.append(w)
+                        if w in prev:
+                            meets.append(w)
+                front_b = next_front
+            if meets:
+                meet = min(meets, key=lambda w: dist_f[w] + dist_b[w])
+                if dist_f[meet] + dist_b[meet] > max_depth:
+                    return None
+                path = []
+                w = meet
+                while w is not None:
+                    path.append(w)
+                    w = prev[w]
+                path.reverse()
+                w = succ[meet]
+                while w is not None:
+                    path.append(w)
+                    w = succ[w]
+                return path
+        return None
+
+    def _path_result(self, path: list[int] | None) -> dict:
+        """same shape as the neo4j path results: nodes and (parent, 'subcat', child) edges"""
+        if not path:
+            return {}
+        nodes = [{'title': self.titles[v], 'f_title': self.f_titles[v]} for v in path]
+        edges = []
+        for a, b in zip(path, path[1:]):
+            if b in self.children(a):
+                edges.append((self.titles[a], 'subcat', self.titles[b]))
+            else:
+                edges.append((self.titles[b], 'subcat', self.titles[a]))
+        return {'nodes': nodes, 'edges': edges}
+
+    def shortest_path(self, source: int, target: int, max_depth: int = 15) -> list[int] | None:
+        """undirected shortest path"""
+        return self._bidirectional_bfs(source, target, self.neighbors, self.neighbors, max_depth)
+
+    def line_path(self, source: int, target: int, max_depth: int = 16) -> list[int] | None:
+        """hierarchical path going down from source to its descendant target"""
+        return self._bidirectional_bfs(source, target, self.children, self.parents, max_depth)
+
+    def _expand(self, frontier: list[int]) -> dict[int, list[int]]:
+        return {v: self.parents(v) for v in frontier}
+
+    def distance_path(self, source: str, target: str) -> dict:
+        """local equivalent of the neo4j based get_distance_path
+
+        cpu bound over the whole graph, call it through run_in_threadpool
+        """
+        s, t = self.find(source), self.find(target)
+        if s is None or t is None:
+            return {'d1': {}, 'd2': {}, 'd3': {}, 'd4s': None}
+
+        result = {
+            'd1': self._path_result(self.shortest_path(s, t)),
+            'd2': self._path_result(self.line_path(s, t)),
+            'd3': self._path_result(self.line_path(t, s)),
+        }
+        ancestors = lowest_common_ancestors_sync(s, t, self._expand)
+        if ancestors is None:
+            result['d4s'] = None
+            return result
+
+        rode_results = []
+        for v, source_path, target_path in ancestors:
+            if v == s or v == t:
+                continue
+            sr = self._path_result(source_path)
+            dr = self._path_result(target_path)
+            sr['nodes'] = sr['nodes'][::-1]
+            sr['nodes'].extend(dr['nodes'])
+            sr['edges'].extend(dr['edges'])
+            rode_results.append(sr)
+        result['d4s'] = rode_results
+        return result
+
+
+def _walk_down(v, reached_from: dict) -> list:
+    path = []
+    while v is not None:
+        path.append(v)
+        v = reached_from[v]
+    return path
+
+
+def _lowest_common_ancestors(source, target, max_depth: int):
+    """the search of lowest_common_ancestors, yields frontiers and is sent their parents"""
+    # node -> the node it was reached from, None for the start nodes
+    up_s, up_t = {source: None}, {target: None}
+    front_s, front_t = [source], [target]
+    for _ in range(max_depth):
+        parents = yield list(set(front_s) | set(front_t))
+        for front, reached_from in ((front_s, up_s), (front_t, up_t)):
+            next_front = []
+            for v in front:
+                for w in parents.get(v, []):
+                    if w not in reached_from:
+                        reached_from[w] = v
+                        next_front.append(w)
+            front[:] = next_front
+
+        common = up_s.keys() & up_t.keys()
+        if common:
+            return [(v, _walk_down(v, up_s), _walk_down(v, up_t)) for v in sorted(common)]
+        if not front_s and not front_t:
+            break
+    return None
+
+
+async def lowest_common_ancestors(source, target, expand, max_depth: int = 9):
+    """every minimal common ancestor of source and target, with the path down to each
+
+    The upward frontiers of both nodes grow together one level per round, `expand`
+    maps a frontier to the parents of its nodes. The search stops at the first level
+    where the two sides meet and returns (ancestor, path to source, path to target)
+    tuples, paths going from the ancestor down. None when they do not meet within
+    max_depth levels.
+    """
+    search = _lowest_common_ancestors(source, target, max_depth)
+    try:
+        frontier = next(search)
+        while True:
+            frontier = search.send(await expand(frontier))
+    except StopIteration as stop:
+        return stop.value
+
+
+def lowest_common_ancestors_sync(source, target, expand, max_depth: int = 9):
+    """lowest_common_ancestors with a plain function as expand"""
+    search = _lowest_common_ancestors(source, target, max_depth)
+    try:
+        frontier = next(search)
+        while True:
+            frontier = search.send(expand(frontier))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _load_or_build(lang: str) -> CategoryGraph | None:
+    path = os.path.join(config.CATEGORY_GRAPH_DIR, lang)
+    if snapshot.exists(path):
+        return CategoryGraph.load(path)
+    if config.CATEGORY_GRAPH_BUILD:
+        client = pymongo.MongoClient(config.MONGO_URI)
+        try:
+            return CategoryGraph.build_from_mongo(client.get_database("baike_demo"), lang)
+        finally:
+            client.close()
+    return None
+
+
+async def load_graphs():
+    for lang in config.CATEGORY_GRAPH_LANGS:
+        graph = await run_in_threadpool(_load_or_build, lang)
+        if graph is not None:
+            print("category graph loaded", lang, len(graph))
+            graphs[lang] = graph
@@ -0,0 +1,78 @@
+from collections import Counter
+
+import pymongo
+
+# member counts of every category in {lang}_category_stats, _id is the category
+# title like the `to` of categorylinks, built and updated by
+# script/metapedia/build_category_stats.py
+TYPES = ['page', 'subcat', 'file']
+
+
+def collection_name(lang: str) -> str:
+    return f'{lang}_category_stats'
+
+
+def count_pipeline(match: dict) -> list[dict]:
+    return [
+        {'$match': match},
+        {'$group': {'_id': {'to': '$to', 'type': '$type'}, 'n': {'$sum': 1}}},
+        {'$group': {
+            '_id': '$_id.to',
+            **{t: {'$sum': {'$cond': [{'$eq': ['$_id.type', t]}, '$n', 0]}} for t in TYPES},
+        }},
+    ]
+
+
+def build(database, lang: str):
+    """count the members of every category of {lang}_categorylinks, replaces the old counts at once"""
+    pipeline = count_pipeline({}) + [{'$out': collection_name(lang)}]
+    database[f'{lang}_categorylinks'].aggregate(pipeline, allowDiskUse=True)
+    return database[collection_name(lang)].estimated_document_count()
+
+
+def recount(database, lang: str, titles: list[str]) -> int:
+    """exact counts of a few categories, to repair drift from missed deltas"""
+    counted = {doc['_id']: doc for doc in database[f'{lang}_categorylinks'].aggregate(count_pipeline({'to': {'$in': titles}}))}
+    requests = [
+        pymongo.ReplaceOne({'_id': title}, counted.get(title) or {'_id': title, **{t: 0 for t in TYPES}}, upsert=True)
+        for title in titles
+    ]
+    if requests:
+        database[collection_name(lang)].bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+def apply(database, lang: str, events) -> int:
+    """apply categorylinks changes as counter deltas
+
+    events: dicts with op 'insert' or 'delete' and the `to`/`type` of the
+    categorylinks row, the same rows the dump loader writes or removes.
+    Categories without stats yet are counted from scratch, a delta alone
+    would leave their other counts missing.
+    """
+    deltas = Counter()
+    for event in events:
+        if event['type'] not in TYPES:
+            continue
+        deltas[event['to'], event['type']] += 1 if event['op'] == 'insert' else -1
+    requests = [
+        pymongo.UpdateOne({'_id': to}, {'$inc': {link_type: delta}})
+        for (to, link_type), delta in deltas.items() if delta
+    ]
+    if not requests:
+        return 0
+    collection = database[collection_name(lang)]
+    result = collection.bulk_write(requests, ordered=False)
+    if result.matched_count < len(requests):
+        titles = list({to for to, _ in deltas})
+        known = {doc['_id'] for doc in collection.find({'_id': {'$in': titles}}, {'_id': 1})}
+        recount(database, lang, [title for title in titles if title not in known])
+    return len(requests)
+
+
+async def get(database, title: str, lang: str) -> dict | None:
+    """page/subcat/file counts of a category, None when the stats were never built for it"""
+    doc = await database[collection_name(lang)].find_one({'_id': title})
+    if doc is None:
+        return None
+    return {t: doc.get(t, 0) for t in TYPES}
@@ -0,0 +1,249 @@
+import time
+import zlib
+from collections import defaultdict
+
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # optional, `uv sync --extra compression`
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# bytes and cpu time by route path, for /stats/compression
+stats: dict[str, dict] = defaultdict(lambda: {
+    'responses': 0,
+    'compressed': 0,
+    'bytes_in': 0,
+    'bytes_out': 0,
+    'cpu_seconds': 0.0,
+    'encodings': defaultdict(int),
+})
+
+# already compressed or not worth it
+SKIP_TYPES = ('image/', 'video/', 'audio/', 'application/zip', 'application/gzip', 'application/vnd.apache.parquet')
+# stats key of the requests no route matched
+UNMATCHED = '<unmatched>'
+# chunks at least this big are compressed in the threadpool instead of the event loop
+THREAD_CHUNK = 256 * 1024
+
+
+class _Gzip:
+    levels = (1, 9)
+
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    levels = (0, 11)
+
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        out = self.compressor.process(data)
+        return out + (self.compressor.finish() if last else self.compressor.flush())
+
+
+class _Zstd:
+    levels = (1, 19)
+
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        out = self.compressor.compress(data)
+        return out + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH if last else zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+# in order of preference, the ones installed
+ENCODERS = {
+    name: (encoder, level)
+    for name, encoder, level, available in [
+        ('zstd', _Zstd, 3, zstandard is not None),
+        ('br', _Brotli, 4, brotli is not None),
+        ('gzip', _Gzip, 6, True),
+    ]
+    if available
+}
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """installed encoding with the highest q the client gives, None for identity"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name.lower()] = q
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = accepted.get(name, accepted.get('*', 0.0))
+        # ENCODERS order only breaks ties
+        if q > best_q:
+            best, best_q = name, q
+    if accepted.get('identity', 0.0) > best_q:
+        return None
+    return best
+
+
+def _compress(encoder, data: bytes, last: bool) -> tuple[bytes, float]:
+    start = time.thread_time()
+    out = encoder.compress(data, last)
+    return out, time.thread_time() - start
+
+
+class CompressionMiddleware:
+    """gzip / brotli / zstd response compression
+
+    Bodies below minimum_size are sent as they are. Bigger and streaming bodies
+    are compressed chunk by chunk, each chunk flushed so streams keep flowing.
+    `route_levels` maps path prefixes to a compression level, clamped to each
+    encoding's range, the longest matching prefix wins.
+    """
+    def __init__(self, app, minimum_size: int = 1024, route_levels: dict[str, int] | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.route_levels = sorted((route_levels or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def level(self, path: str, encoding: str) -> int:
+        encoder, level = ENCODERS[encoding]
+        for prefix, route_level in self.route_levels:
+            if path.startswith(prefix):
+                low, high = encoder.levels
+                return max(low, min(high, route_level))
+        return level
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        headers = dict((name.lower(), value) for name, value in scope['headers'])
+        encoding = negotiate(headers.get(b'accept-encoding', b'').decode('latin-1'))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        buffer = []
+        buffered = 0
+        encoder = None
+        route = None
+        # None: undecided, True: compressing, False: passing through
+        compressing = None
+
+        async def compress(body: bytes, last: bool) -> bytes:
+            if len(body) >= THREAD_CHUNK:
+                out, cpu = await run_in_threadpool(_compress, encoder, body, last)
+            else:
+                out, cpu = _compress(encoder, body, last)
+            route['bytes_in'] += len(body)
+            route['bytes_out'] += len(out)
+            route['cpu_seconds'] += cpu
+            return out
+
+        async def send_compressed(message):
+            nonlocal start_message, buffered, encoder, route, compressing
+            if message['type'] == 'http.response.start':
+                response_headers = dict((name.lower(), value) for name, value in message.get('headers', []))
+                content_type = response_headers.get(b'content-type', b'').decode('latin-1')
+                if (b'content-encoding' in response_headers or content_type.startswith(SKIP_TYPES)
+                        or message['status'] < 200 or message['status'] == 204):
+                    compressing = False
+                    await send(message)
+                    return
+                if message['status'] == 304:
+                    # stands for a 200 that would have been compressed, same etag
+                    compressing = False
+                    await send(self._start(message, None, None))
+                    return
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or compressing is False:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if compressing is None:
+                buffer.append(body)
+                buffered += len(body)
+                if more_body and buffered < self.minimum_size:
+                    return
+                path = scope['route'].path if 'route' in scope else scope['path']
+                # 404s and scanner urls share one entry, stats stays bounded
+                route = stats[scope['route'].path if 'route' in scope else UNMATCHED]
+                route['responses'] += 1
+                body = b''.join(buffer)
+                buffer.clear()
+                if not more_body and buffered < self.minimum_size:
+                    compressing = False
+                    await send(self._start(start_message, None, None))
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+
+                compressing = True
+                route['compressed'] += 1
+                route['encodings'][encoding] += 1
+                encoder_class, _ = ENCODERS[encoding]
+                encoder = encoder_class(self.level(path, encoding))
+                out = await compress(body, not more_body)
+                await send(self._start(start_message, encoding, None if more_body else len(out)))
+                await send({'type': 'http.response.body', 'body': out, 'more_body': more_body})
+                return
+
+            out = await compress(body, not more_body)
+            await send({'type': 'http.response.body', 'body': out, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _start(message: dict, encoding: str | None, length: int | None) -> dict:
+        """weak etag and Vary: Accept-Encoding, content-encoding too when the body is compressed
+
+        Small bodies and 304s of a client that accepts an encoding get the same
+        etag as the compressed ones, whatever size the next response has.
+        """
+        headers = []
+        vary = []
+        for name, value in message.get('headers', []):
+            lower = name.lower()
+            if lower == b'content-length' and encoding is not None:
+                continue
+            if lower == b'vary':
+                vary += [v.strip() for v in value.split(b',')]
+                continue
+            if lower == b'etag' and not value.startswith(b'W/'):
+                # the compressed bytes are another representation
+                value = b'W/' + value
+            headers.append((name, value))
+        if b'accept-encoding' not in {v.lower() for v in vary}:
+            vary.append(b'Accept-Encoding')
+        headers.append((b'vary', b', '.join(vary)))
+        if encoding is not None:
+            headers.append((b'content-encoding', encoding.encode()))
+        if length is not None:
+            headers.append((b'content-length', str(length).encode()))
+        return {**message, 'headers': headers}
+
+
+def snapshot() -> dict:
+    ret = {}
+    for path, route in stats.items():
+        ret[path] = {
+            **route,
+            'encodings': dict(route['encodings']),
+            'bytes_saved': route['bytes_in'] - route['bytes_out'],
+            'ratio': round(route['bytes_out'] / route['bytes_in'], 4) if route['bytes_in'] else None,
+        }
+    return ret
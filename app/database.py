@@ -0,0 +1,13 @@
+from pymongo import AsyncMongoClient
+from app import config
+
+# one async client per process, shared by every router
+client = AsyncMongoClient(config.MONGO_URI, maxPoolSize=config.MONGO_MAX_POOL_SIZE)
+
+
+def get_database(name: str):
+    return client.get_database(name)
+
+
+async def close():
+    await client.close()
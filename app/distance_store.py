@@ -0,0 +1,138 @@
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app import config, snapshot
+
+# loaded in the app lifespan, None means the routers fall back to mongo
+store: "DistanceStore | None" = None
+
+
+class DistanceStore:
+    """openalex country google distances as dense memory-mapped arrays
+
+    `country` is (country, country, year) from country_google_distance_v2 and
+    `subject` is (country, country, concept, concept, year) from
+    country_google_distance_concept_v2. Like the mongo documents, values sit at
+    the alphabetically sorted country pair; countries are stored sorted so the
+    smaller index is the smaller name. Missing years are NaN, the `*_present`
+    masks tell which documents existed at all.
+    """
+    def __init__(self, meta: dict, arrays: dict):
+        self.countries = meta['countries']
+        self.concepts = meta['concepts']
+        self.start_year = meta['start_year']
+        self.end_year = meta['end_year']
+        self.country_index = {name: i for i, name in enumerate(self.countries)}
+        self.concept_index = {concept: i for i, concept in enumerate(self.concepts)}
+        self.country = arrays['country']
+        self.country_present = arrays['country_present']
+        self.subject = arrays['subject']
+        self.subject_present = arrays['subject_present']
+
+    @classmethod
+    def load(cls, path: str):
+        meta, arrays = snapshot.load_arrays(path)
+        return cls(meta, arrays)
+
+    @classmethod
+    def export(cls, database, path: str):
+        """dump both mongo collections into a store directory"""
+        country_collection = database.country_google_distance_v2
+        subject_collection = database.country_google_distance_concept_v2
+
+        countries = set()
+        concepts = set()
+        for collection in (country_collection, subject_collection):
+            countries.update(collection.distinct('a'))
+            countries.update(collection.distinct('b'))
+        concepts.update(subject_collection.distinct('ac'))
+        concepts.update(subject_collection.distinct('bc'))
+        years = list(subject_collection.aggregate([{'$group': {'_id': None, 'start': {'$min': '$start_year'}, 'end': {'$max': '$end_year'}}}]))
+        years += list(country_collection.aggregate([{'$group': {'_id': None, 'start': {'$min': '$start_year'}, 'end': {'$max': '$end_year'}}}]))
+        meta = {
+            'countries': sorted(countries),
+            'concepts': sorted(concepts),
+            'start_year': min(doc['start'] for doc in years),
+            'end_year': max(doc['end'] for doc in years),
+        }
+        country_index = {name: i for i, name in enumerate(meta['countries'])}
+        concept_index = {concept: i for i, concept in enumerate(meta['concepts'])}
+        C, K, Y = len(country_index), len(concept_index), meta['end_year'] - meta['start_year'] + 1
+
+        country = snapshot.create_array(path, 'country', np.float32, (C, C, Y), np.nan)
+        country_present = snapshot.create_array(path, 'country_present', np.bool_, (C, C), False)
+        for doc in country_collection.find({}, {'_id': 0}, batch_size=10000):
+            a, b = country_index[doc['a']], country_index[doc['b']]
+            offset = doc['start_year'] - meta['start_year']
+            country[a, b, offset:offset + len(doc['d_total'])] = doc['d_total']
+            country_present[a, b] = True
+
+        subject = snapshot.create_array(path, 'subject', np.float32, (C, C, K, K, Y), np.nan)
+        subject_present = snapshot.create_array(path, 'subject_present', np.bool_, (C, C, K, K), False)
+        for doc in subject_collection.find({}, {'_id': 0}, batch_size=10000):
+            a, b = country_index[doc['a']], country_index[doc['b']]
+            ac, bc = concept_index[doc['ac']], concept_index[doc['bc']]
+            offset = doc['start_year'] - meta['start_year']
+            subject[a, b, ac, bc, offset:offset + len(doc['d_total'])] = doc['d_total']
+            subject_present[a, b, ac, bc] = True
+
+        for array in (country, country_present, subject, subject_present):
+            array.flush()
+        snapshot.write_meta(path, meta)
+        return cls.load(path)
+
+    def _years(self, year_start: int, year_end: int) -> slice | None:
+        if year_start < self.start_year or year_end > self.end_year:
+            return None
+        return slice(year_start - self.start_year, year_end - self.start_year + 1)
+
+    def _pair(self, a: str, b: str) -> tuple[int, int] | None:
+        a, b = sorted([a, b])
+        if a not in self.country_index or b not in self.country_index:
+            return None
+        return self.country_index[a], self.country_index[b]
+
+    def country_distance(self, a: str, b: str, year_start: int, year_end: int) -> np.ndarray | None:
+        pair, years = self._pair(a, b), self._years(year_start, year_end)
+        if pair is None or years is None or not self.country_present[pair]:
+            return None
+        return self.country[pair][years]
+
+    def subject_distance(self, a: str, b: str, subject_a: int, subject_b: int, year_start: int, year_end: int) -> np.ndarray | None:
+        pair, years = self._pair(a, b), self._years(year_start, year_end)
+        if pair is None or years is None or subject_a not in self.concept_index or subject_b not in self.concept_index:
+            return None
+        key = (*pair, self.concept_index[subject_a], self.concept_index[subject_b])
+        if not self.subject_present[key]:
+            return None
+        return self.subject[key][years]
+
+    def subject_tensor(self, nodes: list[tuple[str, int]], year_start: int, year_end: int) -> np.ndarray:
+        """(node, node, year) distances of (country, subject) nodes, NaN where missing"""
+        tensor = np.full((len(nodes), len(nodes), year_end - year_start + 1), np.nan)
+        years = self._years(year_start, year_end)
+        known = [i for i, (name, subject) in enumerate(nodes) if name in self.country_index and subject in self.concept_index]
+        if years is None or not known:
+            return tensor
+        country = np.array([self.country_index[nodes[i][0]] for i in known])
+        concept = np.array([self.concept_index[nodes[i][1]] for i in known])
+        # sorted country pair, subjects in the order they were asked
+        a = np.minimum.outer(country, country)
+        b = np.maximum.outer(country, country)
+        ac = np.broadcast_to(concept[:, np.newaxis], a.shape)
+        bc = np.broadcast_to(concept[np.newaxis, :], a.shape)
+        tensor[np.ix_(known, known)] = self.subject[a, b, ac, bc, years]
+        return tensor
+
+
+def _load():
+    if snapshot.exists(config.DISTANCE_STORE_DIR):
+        return DistanceStore.load(config.DISTANCE_STORE_DIR)
+    return None
+
+
+async def load_store():
+    global store
+    store = await run_in_threadpool(_load)
+    if store is not None:
+        print("distance store loaded", len(store.countries), "countries", len(store.concepts), "concepts")
@@ -0,0 +1,68 @@
+from contextlib import asynccontextmanager
+from neo4j import AsyncGraphDatabase, AsyncDriver
+from app import config
+
+# process wide neo4j driver, created in the app lifespan
+driver: AsyncDriver | None = None
+
+_sessions = {
+    'active': 0,
+    'peak': 0,
+    'total': 0,
+}
+
+
+async def connect():
+    global driver
+    if driver is None:
+        driver = AsyncGraphDatabase.driver(
+            config.NEO4J_URI,
+            auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
+            max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=config.NEO4J_ACQUISITION_TIMEOUT,
+        )
+    return driver
+
+
+async def close():
+    global driver
+    if driver is not None:
+        await driver.close()
+        driver = None
+
+
+@asynccontextmanager
+async def session(database: str):
+    """borrow a session from the shared pool"""
+    await connect()
+    _sessions['active'] += 1
+    _sessions['total'] += 1
+    _sessions['peak'] = max(_sessions['peak'], _sessions['active'])
+    try:
+        async with driver.session(database=database) as s:
+            yield s
+    finally:
+        _sessions['active'] -= 1
+
+
+async def execute_read(database: str, work, *args):
+    async with session(database) as s:
+        return await s.execute_read(work, *args)
+
+
+def stats() -> dict:
+    ret = {
+        'max_pool_size': config.NEO4J_MAX_POOL_SIZE,
+        'acquisition_timeout': config.NEO4J_ACQUISITION_TIMEOUT,
+        'sessions': dict(_sessions),
+        'connections': [],
+    }
+    # the pool does not expose public counters, read them best effort
+    pool = getattr(driver, '_pool', None)
+    for address, connections in list(getattr(pool, 'connections', {}).items()):
+        ret['connections'].append({
+            'address': str(address),
+            'open': len(connections),
+            'in_use': pool.in_use_connection_count(address),
+        })
+    return ret
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+
+from fastapi import Depends, HTTPException, Request
+
+from app import config, database, snapshot
+from app import category_stats, distance_store, page_profile, works_cube
+from app.cache import cached
+
+# dataset name -> version of its snapshot files, set in the app lifespan once
+# the data is loaded. A new version changes every etag of the dataset's routes.
+versions: dict[str, str] = {}
+
+
+def snapshot_version(*paths: str) -> str:
+    """version of the loaded snapshot directories, changes when one is rebuilt"""
+    digest = hashlib.sha1()
+    for path in paths:
+        if snapshot.exists(path):
+            meta = os.path.join(path, 'meta.json')
+            with open(meta, 'rb') as f:
+                digest.update(f.read())
+            digest.update(str(os.stat(meta).st_mtime_ns).encode())
+    return digest.hexdigest()[:16]
+
+
+def load_versions():
+    """KNOGEN_DATASET_VERSIONS wins, bump it after reloading mongo-only data"""
+    versions['openalex'] = snapshot_version(config.DISTANCE_STORE_DIR, config.WORKS_CUBE_DIR)
+    versions['metapedia'] = snapshot_version(
+        *(os.path.join(config.CATEGORY_GRAPH_DIR, lang) for lang in config.CATEGORY_GRAPH_LANGS))
+    versions.update(config.DATASET_VERSIONS)
+
+
+def mongo_collections(dataset: str) -> list[tuple[str, str]]:
+    """(database, collection) the dataset's cacheable routes read from mongo with the data loaded now"""
+    ret = []
+    if dataset == 'metapedia':
+        for lang in ('en', 'zh'):
+            ret += [('baike_demo', f'{lang}_{name}') for name in ('page', 'redirect', 'categorylinks', 'langlinks')]
+            ret.append(('baike_demo', category_stats.collection_name(lang)))
+        ret.append(('baike_demo', page_profile.COLLECTION))
+    elif dataset == 'openalex':
+        if distance_store.store is None:
+            ret += [('openalex', 'country_google_distance_v2'), ('openalex', 'country_google_distance_concept_v2')]
+        # a cube built from mongo at startup has no snapshot to version
+        if works_cube.cube is None or not snapshot.exists(config.WORKS_CUBE_DIR):
+            ret.append(('openalex', 'works_count_by_country'))
+    return ret
+
+
+@cached(16, ttl=config.DATASET_VERSION_TTL)
+async def mongo_version(dataset: str) -> str:
+    """document counts of the dataset's mongo collections, changes when one is reloaded"""
+    digest = hashlib.sha1()
+    for name, collection in mongo_collections(dataset):
+        count = await database.get_database(name)[collection].estimated_document_count()
+        digest.update(f'{name}.{collection}={count};'.encode())
+    return digest.hexdigest()[:16]
+
+
+async def dataset_version(dataset: str) -> tuple[str, bool]:
+    """(version, weak), weak when some of the data comes straight from mongo
+
+    Documents rewritten in place keep the counts, bump KNOGEN_DATASET_VERSIONS
+    for those. Pinned versions are used as they are.
+    """
+    weak = bool(mongo_collections(dataset))
+    if dataset in config.DATASET_VERSIONS or not weak:
+        return versions.get(dataset, ''), weak
+    return f"{versions.get(dataset, '')}-{await mongo_version(dataset)}", weak
+
+
+async def request_etag(dataset: str, request: Request) -> str:
+    """etag of (dataset version, route, normalized request), nothing of the response is built
+
+    Weak for the routes that read mongo, their version only follows the collection sizes.
+    """
+    version, weak = await dataset_version(dataset)
+    body = await request.body()
+    try:
+        body = json.loads(body) if body else None
+    except ValueError:
+        pass
+    key = json.dumps([
+        version,
+        request.method,
+        request.url.path,
+        # parameter order does not matter, the order of repeated values does
+        sorted(request.query_params.multi_items(), key=lambda item: item[0]),
+        body,
+        # the same request has a json and an arrow representation
+        request.headers.get('accept', ''),
+    ], sort_keys=True, ensure_ascii=False, default=str)
+    etag = '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+    return 'W/' + etag if weak else etag
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """weak comparison, as If-None-Match is defined with"""
+    if if_none_match.strip() == '*':
+        return True
+    return _opaque(etag) in {_opaque(tag.strip()) for tag in if_none_match.split(',')}
+
+
+def conditional(dataset: str, cache_control: str):
+    """route dependency: etag + Cache-Control on the response, 304 when If-None-Match matches
+
+    The headers are added by HTTPCacheMiddleware, so they also reach routes
+    that return a Response of their own.
+    """
+    async def dependency(request: Request):
+        etag = await request_etag(dataset, request)
+        # CompressionMiddleware weakens the etag when it applies, 304s included
+        headers = {'ETag': etag, 'Cache-Control': cache_control, 'Vary': 'Accept, Accept-Encoding'}
+        if request.method in ('GET', 'HEAD'):
+            if_none_match = request.headers.get('if-none-match')
+            if if_none_match and _matches(if_none_match, etag):
+                raise HTTPException(status_code=304, headers=headers)
+        request.state.http_cache = headers
+    return Depends(dependency)
+
+
+class HTTPCacheMiddleware:
+    """copy the headers set by `conditional` onto the response"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        async def send_with_headers(message):
+            if message['type'] == 'http.response.start':
+                headers = scope.get('state', {}).get('http_cache')
+                if headers and 200 <= message['status'] < 300:
+                    names = {name.lower() for name, _ in message.get('headers', [])}
+                    message.setdefault('headers', [])
+                    message['headers'] = list(message['headers']) + [
+                        (name.lower().encode(), value.encode())
+                        for name, value in headers.items() if name.lower().encode() not in names
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
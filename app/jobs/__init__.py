@@ -0,0 +1,179 @@
+"""offline precomputation jobs, run with `knogen-jobs <job>` (see app/jobs/cli.py)
+
+A job splits its work into partitions, the runner sends the partitions to a
+process pool, prints progress and throughput as they finish and records the
+finished ones in a checkpoint file, so an interrupted run resumes where it
+stopped. With workers=1 everything runs in the calling process, which is how a
+job is pointed at a local stand-in: a mongod on localhost through the uris, or
+any pymongo compatible client through `client_factory`.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+import pymongo
+
+# job name -> class, filled by @register
+registry: dict[str, type["Job"]] = {}
+
+# mongo clients of this process by (factory, uri), clients do not survive a fork
+# so every worker process opens its own
+_clients = {}
+
+
+def register(cls):
+    registry[cls.name] = cls
+    return cls
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Job:
+    """one precomputation
+
+    Subclasses set `name`, add their options in `add_arguments`, list their
+    partitions in the parent process and compute one partition per
+    `run_partition` call in a worker. Partitions must be json values, they are
+    the checkpoint keys. `run_partition` returns {'read': n, 'written': m}.
+    """
+    name = ''
+    description = ''
+    client_factory = pymongo.MongoClient
+
+    def __init__(self, source_uri: str, dest_uri: str, batch_size: int = 1000, **options):
+        self.source_uri = source_uri
+        self.dest_uri = dest_uri
+        self.batch_size = batch_size
+        self.options = options
+
+    @classmethod
+    def add_arguments(cls, parser):
+        pass
+
+    def connect(self, uri: str):
+        key = (self.client_factory, uri)
+        if key not in _clients:
+            _clients[key] = self.client_factory(uri)
+        return _clients[key]
+
+    def source(self, database: str):
+        return self.connect(self.source_uri).get_database(database)
+
+    def dest(self, database: str):
+        return self.connect(self.dest_uri).get_database(database)
+
+    def fingerprint(self) -> str:
+        """options that change what the partitions mean, a checkpoint of other options is not reused"""
+        return hashlib.sha1(json.dumps([self.source_uri, self.options], sort_keys=True, default=str).encode()).hexdigest()
+
+    def partitions(self) -> list:
+        raise NotImplementedError
+
+    def run_partition(self, partition) -> dict:
+        raise NotImplementedError
+
+    def write(self, collection, requests) -> int:
+        """bulk_write in batches of batch_size, returns the number of requests"""
+        n = 0
+        for batch in batched(requests, self.batch_size):
+            collection.bulk_write(batch, ordered=True)
+            n += len(batch)
+        return n
+
+
+class Checkpoint:
+    """finished partitions of a job, rewritten atomically after every partition"""
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done = set()
+
+    @staticmethod
+    def key(partition) -> str:
+        return json.dumps(partition, sort_keys=True)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get('fingerprint') != self.fingerprint:
+            print('checkpoint', self.path, 'was written with other options, starting over')
+            return
+        self.done = set(data['done'])
+
+    def __contains__(self, partition) -> bool:
+        return self.key(partition) in self.done
+
+    def add(self, partition):
+        self.done.add(self.key(partition))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'done': sorted(self.done)}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+
+class Progress:
+    def __init__(self, name: str, total: int, skipped: int):
+        self.name = name
+        self.total = total
+        self.finished = skipped
+        self.skipped = skipped
+        self.read = 0
+        self.written = 0
+        self.start = time.time()
+
+    def update(self, partition, stats: dict):
+        self.finished += 1
+        self.read += stats.get('read', 0)
+        self.written += stats.get('written', 0)
+        elapsed = time.time() - self.start
+        ran = self.finished - self.skipped
+        eta = elapsed / ran * (self.total - self.finished)
+        print(
+            f'[{self.name}] {self.finished}/{self.total} {json.dumps(partition, ensure_ascii=False)}',
+            f'read {self.read} ({self.read / elapsed:.0f}/s)',
+            f'written {self.written} ({self.written / elapsed:.0f}/s)',
+            f'{elapsed:.1f}s eta {eta:.0f}s',
+            flush=True,
+        )
+
+
+def _run_partition(job: Job, partition) -> dict:
+    return job.run_partition(partition)
+
+
+def run(job: Job, workers: int = 1, checkpoint_path: str | None = None, restart: bool = False) -> Progress:
+    """run every partition not in the checkpoint yet"""
+    checkpoint = Checkpoint(checkpoint_path, job.fingerprint()) if checkpoint_path else None
+    if checkpoint and not restart:
+        checkpoint.load()
+    partitions = job.partitions()
+    todo = [p for p in partitions if not (checkpoint and p in checkpoint)]
+    progress = Progress(job.name, len(partitions), len(partitions) - len(todo))
+    print(f'[{job.name}] partitions {len(partitions)} done {progress.skipped} workers {workers}')
+
+    def finished(partition, stats):
+        if checkpoint:
+            checkpoint.add(partition)
+        progress.update(partition, stats)
+
+    if workers <= 1:
+        for partition in todo:
+            finished(partition, job.run_partition(partition))
+        return progress
+
+    # spawned workers import the job module fresh instead of inheriting the parent's clients
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(_run_partition, job, partition): partition for partition in todo}
+        for future in as_completed(futures):
+            finished(futures[future], future.result())
+    return progress
@@ -0,0 +1,72 @@
+import math
+
+import pymongo
+
+from app.jobs import Job, register
+
+
+class DistanceByPair(Job):
+    """one document per pair with the yearly distances as an array, from one document per pair and year
+
+    country_google_distance ({a, b, year, d_total}) becomes
+    country_google_distance_v2 ({a, b, start_year, end_year, d_total: [...]}),
+    years missing inside the range are NaN, which clean_distance turns into '-'.
+    Partitioned by country `a`.
+    """
+    source_collection = ''
+    dest_collection = ''
+    keys: list[str] = []
+
+    @classmethod
+    def add_arguments(cls, parser):
+        parser.add_argument('--source-collection', default=cls.source_collection)
+
+    def partitions(self) -> list:
+        return sorted(self.source('openalex')[self.options['source_collection']].distinct('a'))
+
+    def pipeline(self, a: str) -> list[dict]:
+        return [
+            {'$match': {'a': a}},
+            {'$sort': {'year': 1}},
+            {'$group': {
+                '_id': {key: f'${key}' for key in self.keys},
+                'years': {'$push': '$year'},
+                'values': {'$push': '$d_total'},
+            }},
+        ]
+
+    def run_partition(self, partition) -> dict:
+        collection = self.source('openalex')[self.options['source_collection']]
+        read = 0
+
+        def requests():
+            nonlocal read
+            for doc in collection.aggregate(self.pipeline(partition), allowDiskUse=True, batchSize=self.batch_size):
+                read += len(doc['years'])
+                start_year, end_year = doc['years'][0], doc['years'][-1]
+                d_total = [math.nan] * (end_year - start_year + 1)
+                for year, value in zip(doc['years'], doc['values']):
+                    d_total[year - start_year] = value
+                key = dict(doc['_id'])
+                yield pymongo.ReplaceOne(key, {**key, 'start_year': start_year, 'end_year': end_year, 'd_total': d_total}, upsert=True)
+
+        written = self.write(self.dest('openalex')[self.dest_collection], requests())
+        return {'read': read, 'written': written}
+
+
+@register
+class CountryGoogleDistance(DistanceByPair):
+    name = 'country_google_distance_v2'
+    description = 'country pair distances as yearly arrays'
+    source_collection = 'country_google_distance'
+    dest_collection = 'country_google_distance_v2'
+    keys = ['a', 'b']
+
+
+@register
+class CountryGoogleDistanceConcept(DistanceByPair):
+    name = 'country_google_distance_concept_v2'
+    description = 'country and concept pair distances as yearly arrays'
+    source_collection = 'country_google_distance_concept'
+    dest_collection = 'country_google_distance_concept_v2'
+    keys = ['a', 'b', 'ac', 'bc']
@@ -0,0 +1,98 @@
+import datetime
+
+import httpx
+
+from app import config
+from app.jobs import Job, batched, register
+from app.wikipedia_summary import clean_summary, is_fresh
+
+# titles per mediawiki request, the extracts limit with exintro
+TITLES_PER_REQUEST = 20
+
+
+def extracts(response: dict, titles: list[str]) -> dict[str, str]:
+    """intro extract of each requested title, following normalization and redirects"""
+    query = response.get('query', {})
+    normalized = {n['from']: n['to'] for n in query.get('normalized', [])}
+    redirects = {r['from']: r['to'] for r in query.get('redirects', [])}
+    pages = {page['title']: page for page in query.get('pages', [])}
+    ret = {}
+    for title in titles:
+        name = normalized.get(title, title)
+        page = pages.get(redirects.get(name, name))
+        ret[title] = "" if not page or page.get('missing') else page.get('extract', "")
+    return ret
+
+
+@register
+class WikipediaSummary(Job):
+    """fill wikipedia_cache.{lang}_summary for the namespace 0 pages of baike_demo
+
+    Titles with a fresh summary are skipped, the rest are fetched 20 per
+    mediawiki request. Partitioned by page id range.
+    """
+    name = 'wikipedia_summary'
+    description = 'prefetch wikipedia summaries of every page into the summary cache'
+
+    @classmethod
+    def add_arguments(cls, parser):
+        parser.add_argument('--lang', choices=['en', 'zh'], required=True)
+        parser.add_argument('--partition-ids', type=int, default=100000)
+
+    def partitions(self) -> list:
+        pages = self.source('baike_demo')[f"{self.options['lang']}_page"]
+        first = pages.find_one({}, {'_id': 1}, sort=[('_id', 1)])
+        last = pages.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        if not first:
+            return []
+        step = self.options['partition_ids']
+        return [[start, start + step] for start in range(first['_id'], last['_id'] + 1, step)]
+
+    def fetch(self, client: httpx.Client, titles: list[str]) -> dict[str, dict]:
+        lang = self.options['lang']
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': 2,
+            'prop': 'extracts',
+            'exintro': 1,
+            'explaintext': 1,
+            'exlimit': 'max',
+            'redirects': 1,
+            'titles': '|'.join(titles),
+        }
+        ok = True
+        try:
+            response = client.get(config.WIKIPEDIA_API_URL.format(lang=lang), params=params)
+            response.raise_for_status()
+            summaries = extracts(response.json(), titles)
+        except Exception as e:
+            print("summary get fail,", titles[0], len(titles), e)
+            summaries, ok = dict.fromkeys(titles, ""), False
+        now = datetime.datetime.now()
+        return {
+            title: {'title': title, 'date': now, 'summary': clean_summary(summary, lang), 'ok': ok}
+            for title, summary in summaries.items()
+        }
+
+    def run_partition(self, partition) -> dict:
+        lang = self.options['lang']
+        start, end = partition
+        pages = self.source('baike_demo')[f'{lang}_page'].find(
+            {'_id': {'$gte': start, '$lt': end}, 'namespace': 0, 'is_redirect': 0}, {'title': 1, 'f_title': 1}, batch_size=self.batch_size)
+        collection = self.dest('wikipedia_cache')[f'{lang}_summary']
+        read = written = 0
+        with httpx.Client(proxy=config.WIKIPEDIA_PROXY, timeout=config.WIKIPEDIA_TIMEOUT, headers={'User-Agent': 'knogen-fast-api'}) as client:
+            for batch in batched((doc.get('f_title') or doc['title'] for doc in pages), self.batch_size):
+                read += len(batch)
+                fresh = set()
+                for doc in collection.find({'title': {'$in': batch}}, {'title': 1, 'summary': 1, 'ok': 1, 'date': 1}):
+                    if is_fresh(doc):
+                        fresh.add(doc['title'])
+                docs = []
+                for titles in batched([title for title in batch if title not in fresh], TITLES_PER_REQUEST):
+                    docs.extend(self.fetch(client, titles).values())
+                if docs:
+                    collection.insert_many(docs, ordered=False)
+                    written += len(docs)
+        return {'read': read, 'written': written}
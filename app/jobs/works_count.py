@@ -0,0 +1,66 @@
+import pymongo
+
+from app.jobs import Job, register
+
+# 统计 country 的不同类别的文章count
+COUNTRIES = [None,"US", "CN", "GB", "DE", "JP", "FR", "IN", "CA", "BR", "IT", "AU", "ES", "KR", "RU", "NL", "ID", "PL", "IR", "SE", "CH", "TR", "TW", "BE", "MX", "IL", "DK", "AT", "FI", "ZA", "PT"]
+
+
+def count_pipeline(year_start: int, year_end: int, type_ids: list) -> list[dict]:
+    return [
+        # {'c': None} never matched c: [], those works are in no bucket
+        {'$match': {'y': {'$gte': year_start, '$lte': year_end}, 't': {'$in': type_ids}, 'c': {'$ne': []}}},
+        # count_documents({'c': cname}) matched arrays containing cname once
+        {'$project': {'_id': 0, 'y': 1, 't': 1, 'c': {'$cond': [{'$isArray': '$c'}, {'$setUnion': ['$c']}, '$c']}}},
+        {'$unwind': {'path': '$c', 'preserveNullAndEmptyArrays': True}},
+        # None also matches works without a country, like {'c': None} did
+        {'$match': {'c': {'$in': COUNTRIES}}},
+        {'$group': {'_id': {'c': '$c', 't': '$t', 'y': '$y'}, 'n': {'$sum': 1}}},
+    ]
+
+
+@register
+class WorksCountByCountry(Job):
+    """openalex.works_count_by_country: works per (country, work type, year), one $group per year range"""
+    name = 'works_count_by_country'
+    description = 'works count per country, type and year'
+
+    @classmethod
+    def add_arguments(cls, parser):
+        parser.add_argument('--year-start', type=int, default=1800)
+        parser.add_argument('--year-end', type=int, default=2024)
+        parser.add_argument('--shard-years', type=int, default=10)
+
+    def type_map(self) -> dict:
+        return {doc['_id']: doc['name'] for doc in self.source('openalex').work_type.find()}
+
+    def partitions(self) -> list:
+        year_start, year_end, step = self.options['year_start'], self.options['year_end'], self.options['shard_years']
+        return [[start, min(start + step - 1, year_end)] for start in range(year_start, year_end + 1, step)]
+
+    def run_partition(self, partition) -> dict:
+        year_start, year_end = partition
+        type_map = self.type_map()
+        counts = {}
+        read = 0
+        for doc in self.source('openalex').works.aggregate(count_pipeline(year_start, year_end, list(type_map)), allowDiskUse=True):
+            # null and missing countries group apart, both count as None
+            key = doc['_id'].get('c'), doc['_id']['t'], doc['_id']['y']
+            counts[key] = counts.get(key, 0) + doc['n']
+            read += doc['n']
+
+        # every combination is written, zero counts included
+        requests = (
+            pymongo.ReplaceOne({'_id': f'{cname}-{year}-{typeName}'}, {
+                '_id': f'{cname}-{year}-{typeName}',
+                'n': cname,
+                't': typeName,
+                'y': year,
+                'c': counts.get((cname, typeID, year), 0),
+            }, upsert=True)
+            for cname in COUNTRIES
+            for typeID, typeName in type_map.items()
+            for year in range(year_start, year_end + 1)
+        )
+        written = self.write(self.dest('openalex').works_count_by_country, requests)
+        return {'read': read, 'written': written}
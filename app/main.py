@@ -1,12 +1,49 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import openalex, baikedemo, wikipedia, metapedia_v1
+from fastapi_cache import FastAPICache
+from app import config, compression, database, graph, category_graph, distance_store, http_cache, prefix_index, works_cube
+from app.shared_cache import SQLiteBackend, ModelCoder
+from app.routers import openalex, baikedemo, wikipedia, metapedia_v1, stats
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    FastAPICache.init(
+        SQLiteBackend(config.SHARED_CACHE_PATH, config.SHARED_CACHE_MAX_BYTES),
+        prefix="knogen",
+        coder=ModelCoder,
+        expire=config.SHARED_CACHE_EXPIRE,
+    )
+    await wikipedia.create_indexes()
+    await metapedia_v1.create_indexes()
+    await graph.connect()
+    await wikipedia.connect()
+    await category_graph.load_graphs()
+    await distance_store.load_store()
+    await works_cube.load_cube()
+    await prefix_index.load_indexes()
+    http_cache.load_versions()
+    yield
+    await graph.close()
+    await wikipedia.close()
+    await metapedia_v1.ES8.close()
+    await database.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(http_cache.HTTPCacheMiddleware)
+# outermost, sees the etag set above
+app.add_middleware(
+    compression.CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MINIMUM_SIZE,
+    route_levels=config.COMPRESSION_ROUTE_LEVELS,
+)
 
 app.include_router(openalex.router)
 app.include_router(baikedemo.router)
 app.include_router(wikipedia.router)
 app.include_router(metapedia_v1.router)
+app.include_router(stats.router)
 
 
 @app.get("/")
@@ -17,4 +54,3 @@ async def read_root():
         List -- Hello World
     """
     return {"Hello": "World"}
-
@@ -0,0 +1,174 @@
+import datetime
+from itertools import islice
+
+import pymongo
+
+# precomputed MetapediaPageItem of every namespace 0 page, one document per
+# (lang, page id) in baike_demo.page_profile, built by
+# script/metapedia/build_page_profile.py
+COLLECTION = 'page_profile'
+LANGS = ['en', 'zh']
+
+
+def other_lang(lang: str) -> str:
+    return "zh" if lang == "en" else "en"
+
+
+def profile_id(lang: str, page_id: int) -> str:
+    return f'{lang}-{page_id}'
+
+
+def create_indexes(database):
+    database[COLLECTION].create_index([('lang', pymongo.ASCENDING), ('keys', pymongo.ASCENDING)])
+    database[COLLECTION].create_index([('lang', pymongo.ASCENDING), ('page_id', pymongo.ASCENDING)])
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _redirects_and_categories(database, lang: str, pages: list[dict]) -> dict[int, dict]:
+    """redirect pages and categories of namespace 0 pages, by page id
+
+    The same data as redirect_and_category_pipeline, with three $in queries for
+    the whole batch instead of one aggregation per page.
+    """
+    ret = {page['_id']: {'redirect': [], 'redirect_keys': [], 'category': []} for page in pages}
+    id_by_title = {page['title']: page['_id'] for page in pages}
+
+    redirect_from = {}
+    for doc in database[f'{lang}_redirect'].find({'title': {'$in': list(id_by_title)}, 'namespace': 0}, {'title': 1}):
+        redirect_from[doc['_id']] = id_by_title[doc['title']]
+    for doc in database[f'{lang}_page'].find({'_id': {'$in': list(redirect_from)}}, {'title': 1, 'f_title': 1}):
+        profile = ret[redirect_from[doc['_id']]]
+        if doc['title'] not in profile['redirect']:
+            profile['redirect'].append(doc['title'])
+        profile['redirect_keys'].extend([doc['title'], doc.get('f_title') or doc['title']])
+
+    for doc in database[f'{lang}_categorylinks'].find({'from': {'$in': list(ret)}}, {'_id': 0, 'from': 1, 'to': 1}):
+        categories = ret[doc['from']]['category']
+        if doc['to'] not in categories:
+            categories.append(doc['to'])
+    return ret
+
+
+def build_profiles(database, lang: str, pages: list[dict]) -> list[dict]:
+    """page_profile documents of a batch of non-redirect namespace 0 {lang}_page documents"""
+    target_lang = other_lang(lang)
+    own = _redirects_and_categories(database, lang, pages)
+
+    other_titles = {
+        doc['from']: doc['title']
+        for doc in database[f'{lang}_langlinks'].find({'from': {'$in': list(own)}, 'lang': target_lang}, {'from': 1, 'title': 1})
+    }
+    # stored en titles use underscores, langlinks use spaces
+    stored = {title: title.replace(' ', '_') if target_lang == 'en' else title for title in other_titles.values()}
+    other_pages = list(database[f'{target_lang}_page'].find(
+        {'title': {'$in': list(set(stored.values()))}, 'namespace': 0}, {'title': 1}))
+    other = _redirects_and_categories(database, target_lang, other_pages)
+    other_by_title = {page['title']: other[page['_id']] for page in other_pages}
+
+    now = datetime.datetime.now()
+    profiles = []
+    for page in pages:
+        item = {
+            'id': page['_id'],
+            'title': page['title'],
+            'lang': lang,
+            f'{lang}_title': page['title'],
+            f'{lang}_redirect': own[page['_id']]['redirect'],
+            f'{lang}_category': own[page['_id']]['category'],
+        }
+        other_title = other_titles.get(page['_id'])
+        if other_title:
+            item[f'{target_lang}_title'] = other_title
+            found = other_by_title.get(stored[other_title])
+            if found:
+                item[f'{target_lang}_redirect'] = found['redirect']
+                item[f'{target_lang}_category'] = found['category']
+        keys = [page['title'], page.get('f_title') or page['title']] + own[page['_id']]['redirect_keys']
+        profiles.append({
+            '_id': profile_id(lang, page['_id']),
+            'lang': lang,
+            'page_id': page['_id'],
+            'title': page['title'],
+            'f_title': page.get('f_title') or page['title'],
+            'keys': list(dict.fromkeys(keys)),
+            'item': item,
+            'update': now,
+        })
+    return profiles
+
+
+def _write(database, lang: str, pages: list[dict]) -> int:
+    profiles = build_profiles(database, lang, pages)
+    if profiles:
+        database[COLLECTION].bulk_write(
+            [pymongo.ReplaceOne({'_id': profile['_id']}, profile, upsert=True) for profile in profiles],
+            ordered=False,
+        )
+    return len(profiles)
+
+
+PAGE_FIELDS = {'title': 1, 'f_title': 1, 'is_redirect': 1}
+
+
+def build(database, lang: str, batch_size: int = 1000, progress=None) -> int:
+    """(re)write the profile of every namespace 0 page of one language"""
+    create_indexes(database)
+    started = datetime.datetime.now()
+    cursor = database[f'{lang}_page'].find({'namespace': 0, 'is_redirect': 0}, PAGE_FIELDS, batch_size=batch_size)
+    total = 0
+    for pages in _batches(cursor, batch_size):
+        total += _write(database, lang, pages)
+        if progress:
+            progress(lang, total)
+    # pages deleted or turned into redirects since the last full build
+    database[COLLECTION].delete_many({'lang': lang, 'update': {'$lt': started}})
+    return total
+
+
+def refresh(database, lang: str, page_ids: list[int], batch_size: int = 1000) -> int:
+    """rebuild the profiles of changed page ids
+
+    A changed page also changes the profile that redirects to it, and the
+    other language profiles linking to it, those are refreshed as well.
+    """
+    create_indexes(database)
+    page_ids = list(set(page_ids))
+    changed = list(database[f'{lang}_page'].find({'_id': {'$in': page_ids}}, PAGE_FIELDS))
+    # redirect pages only live inside the profile of their target
+    targets = [doc['title'] for doc in database[f'{lang}_redirect'].find(
+        {'_id': {'$in': [doc['_id'] for doc in changed if doc['is_redirect'] != 0]}, 'namespace': 0}, {'title': 1})]
+    # a redirect that was removed or retargeted is still a key of its old target
+    stale = [doc['page_id'] for doc in database[COLLECTION].find(
+        {'lang': lang, 'keys': {'$in': [doc['title'] for doc in changed]}}, {'page_id': 1})]
+    pages = {doc['_id']: doc for doc in changed if doc['is_redirect'] == 0}
+    for doc in database[f'{lang}_page'].find(
+            {'$or': [{'title': {'$in': targets}}, {'_id': {'$in': stale}}], 'namespace': 0, 'is_redirect': 0}, PAGE_FIELDS):
+        pages.setdefault(doc['_id'], doc)
+
+    database[COLLECTION].delete_many({'lang': lang, 'page_id': {'$in': page_ids + stale}, '_id': {
+        '$nin': [profile_id(lang, page_id) for page_id in pages]}})
+    total = 0
+    for batch in _batches(pages.values(), batch_size):
+        total += _write(database, lang, batch)
+
+    # the other language holds these titles as its cross-language side
+    titles = [doc['title'].replace('_', ' ') if lang == 'en' else doc['title'] for doc in pages.values()]
+    titles += [doc['title'] for doc in changed]
+    target_lang = other_lang(lang)
+    linked = list(database[f'{target_lang}_page'].find({'_id': {'$in': [
+        doc['page_id'] for doc in database[COLLECTION].find(
+            {'lang': target_lang, f'item.{lang}_title': {'$in': list(set(titles))}}, {'page_id': 1})
+    ]}}, PAGE_FIELDS))
+    for batch in _batches(linked, batch_size):
+        total += _write(database, target_lang, batch)
+    return total
+
+
+async def find(database, title: str, lang: str) -> dict | None:
+    """stored profile of the page a title or f_title names, directly or through a redirect"""
+    return await database[COLLECTION].find_one({'lang': lang, 'keys': title}, {'item': 1, 'title': 1, 'f_title': 1})
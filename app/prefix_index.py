@@ -0,0 +1,130 @@
+import os
+from bisect import bisect_left
+
+import numpy as np
+import pymongo
+from fastapi.concurrency import run_in_threadpool
+
+from app import config, snapshot
+
+# loaded indexes by (lang, namespace), filled in the app lifespan
+indexes: dict[tuple[str, int], "PrefixIndex"] = {}
+
+
+def normalize(title: str) -> str:
+    """index key: case folded, spaces as underscores like f_title"""
+    return title.replace(' ', '_').casefold()
+
+
+class PrefixIndex:
+    """page titles of one language and namespace sorted by normalized f_title
+
+    A prefix selects a contiguous range found with two bisects, the top-k pages
+    of the range are ranked by page `len`.
+    """
+    def __init__(self, keys, titles, f_titles, ids, lens, is_redirect):
+        self.keys = keys
+        self.titles = titles
+        self.f_titles = f_titles
+        self.ids = ids
+        self.lens = lens
+        self.is_redirect = is_redirect
+
+    @classmethod
+    def build(cls, pages):
+        """pages: (id, title, f_title, len, is_redirect) tuples"""
+        rows = sorted(((normalize(f_title), page_id, title, f_title, length, redirect)
+                       for page_id, title, f_title, length, redirect in pages), key=lambda row: row[0])
+        return cls(
+            snapshot.StringTable.from_strings([row[0] for row in rows]),
+            snapshot.StringTable.from_strings([row[2] for row in rows]),
+            snapshot.StringTable.from_strings([row[3] for row in rows]),
+            np.array([row[1] for row in rows], dtype=np.int64),
+            np.array([row[4] for row in rows], dtype=np.int32),
+            np.array([row[5] for row in rows], dtype=np.int8),
+        )
+
+    @classmethod
+    def build_from_mongo(cls, database, lang: str, namespace: int):
+        pages = (
+            (doc['_id'], doc['title'], doc.get('f_title') or doc['title'], doc.get('len') or 0, doc.get('is_redirect') or 0)
+            for doc in database[f'{lang}_page'].find(
+                {'namespace': namespace}, {'title': 1, 'f_title': 1, 'len': 1, 'is_redirect': 1}, batch_size=10000)
+        )
+        return cls.build(pages)
+
+    def save(self, path: str):
+        snapshot.save_arrays(
+            path,
+            {'pages': len(self)},
+            key_offsets=self.keys.offsets,
+            key_blob=self.keys.blob,
+            title_offsets=self.titles.offsets,
+            title_blob=self.titles.blob,
+            f_title_offsets=self.f_titles.offsets,
+            f_title_blob=self.f_titles.blob,
+            ids=self.ids,
+            lens=self.lens,
+            is_redirect=self.is_redirect,
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        _, arrays = snapshot.load_arrays(path, mmap)
+        return cls(
+            snapshot.StringTable(arrays['key_offsets'], arrays['key_blob']),
+            snapshot.StringTable(arrays['title_offsets'], arrays['title_blob']),
+            snapshot.StringTable(arrays['f_title_offsets'], arrays['f_title_blob']),
+            arrays['ids'],
+            arrays['lens'],
+            arrays['is_redirect'],
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def range(self, prefix: str) -> tuple[int, int]:
+        key = normalize(prefix)
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + '\U0010ffff', lo)
+        return lo, hi
+
+    def complete(self, prefix: str, k: int = 5) -> list[int]:
+        """positions of the k longest pages whose title starts with prefix"""
+        lo, hi = self.range(prefix)
+        if hi - lo <= k:
+            top = np.arange(lo, hi)
+        else:
+            top = lo + np.argpartition(-self.lens[lo:hi], k)[:k]
+        return sorted(top.tolist(), key=lambda i: -int(self.lens[i]))
+
+    def page(self, i: int) -> dict:
+        return {
+            'id': int(self.ids[i]),
+            'title': self.titles[i],
+            'f_title': self.f_titles[i],
+            'len': int(self.lens[i]),
+            'is_redirect': int(self.is_redirect[i]),
+        }
+
+
+def _load_or_build(lang: str, namespace: int) -> PrefixIndex | None:
+    path = os.path.join(config.PREFIX_INDEX_DIR, f'{lang}_{namespace}')
+    if snapshot.exists(path):
+        return PrefixIndex.load(path)
+    if config.PREFIX_INDEX_BUILD:
+        client = pymongo.MongoClient(config.MONGO_URI)
+        try:
+            return PrefixIndex.build_from_mongo(client.get_database("baike_demo"), lang, namespace)
+        finally:
+            client.close()
+    return None
+
+
+async def load_indexes():
+    for lang in config.PREFIX_INDEX_LANGS:
+        for namespace in config.PREFIX_INDEX_NAMESPACES:
+            index = await run_in_threadpool(_load_or_build, lang, namespace)
+            if index is not None:
+                print("prefix index loaded", lang, namespace, len(index))
+                indexes[(lang, namespace)] = index
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException
+from fastapi_cache import FastAPICache
+from app import cache, compression, graph
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/neo4j")
+async def neo4j_stats():
+    return {
+        "data": graph.stats(),
+        "ok": True
+    }
+
+
+@router.get("/cache")
+async def cache_stats():
+    return {
+        "data": {name: c.stats() for name, c in cache.registry.items()},
+        "ok": True
+    }
+
+
+@router.delete("/cache/{name}")
+async def cache_clear(name: str):
+    """drop every entry of one cache, e.g. app.routers.openalex.get_country_works_count"""
+    if name not in cache.registry:
+        raise HTTPException(status_code=404, detail="unknown cache")
+    cache.registry[name].clear()
+    return {
+        "ok": True
+    }
+
+
+@router.get("/shared_cache")
+async def shared_cache_stats():
+    return {
+        "data": FastAPICache.get_backend().stats(),
+        "ok": True
+    }
+
+
+@router.delete("/shared_cache")
+async def shared_cache_clear(namespace: str = "metapedia"):
+    count = await FastAPICache.get_backend().clear(namespace=f"{FastAPICache.get_prefix()}:{namespace}")
+    return {
+        "data": count,
+        "ok": True
+    }
+
+
+@router.get("/compression")
+async def compression_stats():
+    """bytes in/out, bytes saved and compression cpu seconds by route"""
+    return {
+        "data": compression.snapshot(),
+        "ok": True
+    }
+
+
+@router.delete("/compression")
+async def compression_clear():
+    compression.stats.clear()
+    return {
+        "ok": True
+    }
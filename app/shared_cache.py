@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi_cache.coder import JsonCoder
+from fastapi_cache.types import Backend
+from pydantic import TypeAdapter
+
+
+class ModelCoder(JsonCoder):
+    """json coder that turns cached values back into the function's return type,
+    so a cached MetapediaPageItem comes back as a model instead of a dict"""
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_=None):
+        result = cls.decode(value)
+        if type_ is None:
+            return result
+        return TypeAdapter(type_).validate_python(result)
+
+
+class SQLiteBackend(Backend):
+    """fastapi-cache2 backend on one sqlite file shared by every worker of a host
+
+    Put the file on tmpfs (/dev/shm) to keep it in memory. When the stored
+    values grow past max_bytes the least recently read entries are evicted.
+    """
+    # reads only refresh the access time when it is older than this, so hot
+    # keys do not turn every read into a write
+    touch_interval = 60
+    # writes are added to a running total, the real one (other workers write
+    # too) is summed again every this many writes and before evicting
+    sync_interval = 100
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total = None
+        self.writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires REAL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _get(self, key: str) -> Tuple[int, Optional[bytes]]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return 0, None
+            value, expires, accessed = row
+            if expires is not None and expires < now:
+                self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return 0, None
+            if accessed < now - self.touch_interval:
+                self.conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        ttl = int(expires - now) if expires is not None else -1
+        return ttl, value
+
+    def _set(self, key: str, value: bytes, expire: Optional[int]):
+        now = time.time()
+        expires = now + expire if expire else None
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), expires, now),
+            )
+            self.writes += 1
+            if self.total is not None and self.writes % self.sync_interval:
+                self.total += len(value) - (old[0] if old else 0)
+                if self.total <= self.max_bytes:
+                    return
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """sum the stored sizes, evict when over max_bytes"""
+        self.total = self.conn.execute("SELECT total(size) FROM cache").fetchone()[0]
+        if self.total <= self.max_bytes:
+            return
+        self.conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+        # drop the least recently read entries until under 90% of the budget
+        self.conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM (SELECT key, sum(size) OVER (ORDER BY accessed DESC) AS running FROM cache)"
+            " WHERE running > ?)",
+            (self.max_bytes * 0.9,),
+        )
+        self.total = self.conn.execute("SELECT total(size) FROM cache").fetchone()[0]
+
+    def _clear(self, namespace: Optional[str], key: Optional[str]) -> int:
+        with self.lock:
+            if namespace:
+                cur = self.conn.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (_like_prefix(namespace),))
+            elif key:
+                cur = self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            else:
+                cur = self.conn.execute("DELETE FROM cache")
+            self.total = None
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        with self.lock:
+            count, size = self.conn.execute("SELECT count(*), total(size) FROM cache").fetchone()
+        return {
+            'path': self.path,
+            'entries': count,
+            'bytes': int(size),
+            'max_bytes': self.max_bytes,
+        }
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        return await run_in_threadpool(self._get, key)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        _, value = await run_in_threadpool(self._get, key)
+        return value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await run_in_threadpool(self._set, key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await run_in_threadpool(self._clear, namespace, key)
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
@@ -0,0 +1,64 @@
+import json
+import os
+import numpy as np
+
+
+class StringTable:
+    """utf-8 strings packed in one byte blob, addressed by offsets
+
+    Works the same on in-memory arrays and on memory-mapped snapshot files.
+    """
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, blob)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+def write_meta(path: str, meta: dict):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def save_arrays(path: str, meta: dict, **arrays: np.ndarray):
+    """write a snapshot directory: one .npy file per array plus meta.json"""
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), array)
+    write_meta(path, meta)
+
+
+def create_array(path: str, name: str, dtype, shape: tuple, fill=0) -> np.memmap:
+    """writable memory-mapped .npy file, for arrays too big to build in memory"""
+    os.makedirs(path, exist_ok=True)
+    array = np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'), mode='w+', dtype=dtype, shape=shape)
+    array[...] = fill
+    return array
+
+
+def load_arrays(path: str, mmap: bool = True) -> tuple[dict, dict]:
+    """read a snapshot directory, arrays are memory-mapped read only by default"""
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    arrays = {}
+    for filename in os.listdir(path):
+        if filename.endswith('.npy'):
+            arrays[filename[:-4]] = np.load(os.path.join(path, filename), mmap_mode='r' if mmap else None)
+    return meta, arrays
+
+
+def exists(path: str) -> bool:
+    return os.path.exists(os.path.join(path, 'meta.json'))
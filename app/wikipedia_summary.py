@@ -0,0 +1,25 @@
+import datetime
+
+from zhconv import convert
+
+from app import config
+
+# summary cache documents of wikipedia_cache.{lang}_summary, shared by the
+# /wikipedia routes and the wikipedia_summary job
+# {
+#     '_id', 'title', 'summary', 'date', 'ok'
+# }
+
+
+def clean_summary(summary: str, lang: str) -> str:
+    summary = summary.replace("()","").replace("（）","")
+    if lang == "zh":
+        summary = convert(summary,'zh-cn')
+    return summary
+
+
+def is_fresh(doc) -> bool:
+    """real summaries never go stale, failures and empty summaries are retried after a while"""
+    if doc.get('summary') and doc.get('ok', True):
+        return True
+    return doc['date'] > datetime.datetime.now() - datetime.timedelta(seconds=config.WIKIPEDIA_NEGATIVE_TTL)
@@ -0,0 +1,93 @@
+import numpy as np
+import pymongo
+from fastapi.concurrency import run_in_threadpool
+
+from app import config, snapshot
+
+# loaded in the app lifespan, None means the router falls back to mongo
+cube: "WorksCube | None" = None
+
+
+class WorksCube:
+    """openalex works_count_by_country as a dense (country, type, year) int64 array
+
+    Country None is the works without a country and type '' the works without a
+    type, like in the collection. Any set of types over a year range is a sum
+    over the type axis.
+    """
+    def __init__(self, meta: dict, counts: np.ndarray):
+        self.countries = meta['countries']
+        self.types = meta['types']
+        self.start_year = meta['start_year']
+        self.end_year = meta['end_year']
+        self.country_index = {name: i for i, name in enumerate(self.countries)}
+        self.type_index = {name: i for i, name in enumerate(self.types)}
+        self.counts = counts
+
+    @classmethod
+    def build_from_mongo(cls, database):
+        docs = list(database.works_count_by_country.find({}, {'_id': 0, 'n': 1, 't': 1, 'y': 1, 'c': 1}, batch_size=10000))
+        if not docs:
+            return None
+        meta = {
+            # None sorts first
+            'countries': sorted({doc['n'] for doc in docs}, key=lambda name: (name is not None, name or '')),
+            'types': sorted({doc['t'] for doc in docs}),
+            'start_year': min(doc['y'] for doc in docs),
+            'end_year': max(doc['y'] for doc in docs),
+        }
+        country_index = {name: i for i, name in enumerate(meta['countries'])}
+        type_index = {name: i for i, name in enumerate(meta['types'])}
+        counts = np.zeros((len(country_index), len(type_index), meta['end_year'] - meta['start_year'] + 1), dtype=np.int64)
+        for doc in docs:
+            counts[country_index[doc['n']], type_index[doc['t']], doc['y'] - meta['start_year']] += doc['c']
+        return cls(meta, counts)
+
+    def save(self, path: str):
+        snapshot.save_arrays(path, {
+            'countries': self.countries,
+            'types': self.types,
+            'start_year': self.start_year,
+            'end_year': self.end_year,
+        }, counts=self.counts)
+
+    @classmethod
+    def load(cls, path: str):
+        meta, arrays = snapshot.load_arrays(path, mmap=False)
+        return cls(meta, arrays['counts'])
+
+    def works_count(self, countries: list[str | None], type_names: list[str], year_start: int, year_end: int) -> np.ndarray:
+        """(country, year) works counts summed over type_names, 0 for unknown labels and years"""
+        ret = np.zeros((len(countries), year_end - year_start + 1), dtype=np.int64)
+        types = sorted({self.type_index[name] for name in type_names if name in self.type_index})
+        known = [i for i, name in enumerate(countries) if name in self.country_index]
+        start, end = max(year_start, self.start_year), min(year_end, self.end_year)
+        if not types or not known or start > end:
+            return ret
+        rows = [self.country_index[countries[i]] for i in known]
+        years = slice(start - self.start_year, end - self.start_year + 1)
+        ret[known, start - year_start:end - year_start + 1] = self.counts[np.ix_(rows, types)][:, :, years].sum(axis=1)
+        return ret
+
+
+def _load_or_build() -> WorksCube | None:
+    if snapshot.exists(config.WORKS_CUBE_DIR):
+        return WorksCube.load(config.WORKS_CUBE_DIR)
+    if config.WORKS_CUBE_BUILD:
+        client = pymongo.MongoClient(config.MONGO_URI, serverSelectionTimeoutMS=5000)
+        try:
+            return WorksCube.build_from_mongo(client.get_database("openalex"))
+        except pymongo.errors.PyMongoError as e:
+            print("works cube build fail", e)
+            return None
+        finally:
+            client.close()
+    return None
+
+
+async def load_cube():
+    global cube
+    cube = await run_in_threadpool(_load_or_build)
+    if cube is not None:
+        print("works cube loaded", len(cube.countries), "countries", len(cube.types), "types",
+              cube.start_year, cube.end_year)
@@ -0,0 +1,28 @@
+import argparse
+import os
+import time
+
+import pymongo
+
+from app import config
+from app.prefix_index import PrefixIndex
+
+# 从 {lang}_page 构建标题前缀索引快照，服务启动时 mmap 加载
+#
+#   PYTHONPATH=. uv run python script/baikedemo/build_prefix_index.py --lang zh --namespace 0
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--lang', action='append', choices=['en', 'zh'])
+parser.add_argument('--namespace', action='append', type=int)
+parser.add_argument('--uri', default=config.MONGO_URI)
+parser.add_argument('--out', default=config.PREFIX_INDEX_DIR)
+args = parser.parse_args()
+
+database = pymongo.MongoClient(args.uri).get_database("baike_demo")
+
+for lang in args.lang or ['en', 'zh']:
+    for namespace in args.namespace or config.PREFIX_INDEX_NAMESPACES:
+        start = time.time()
+        index = PrefixIndex.build_from_mongo(database, lang, namespace)
+        index.save(os.path.join(args.out, f'{lang}_{namespace}'))
+        print(lang, namespace, 'pages', len(index), f'{time.time() - start:.1f}s')
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.routers.openalex import OpenalexEchartsResponse, clean_distance, echarts_response
+
+# /openalex 的 echarts 响应: response_model 校验 + 默认 json 编码 与 orjson 直出 (行 / 列) 的对比
+#
+#   PYTHONPATH=. uv run python script/benchmark/echarts_serializer.py --countries 100
+
+
+def dataset(countries, year_start=1960, year_end=2022):
+    years = year_end - year_start + 1
+    columns = [clean_distance([random.random() * 1.2 if random.random() > 0.1 else math.nan for _ in range(years)])
+               for _ in range(countries)]
+    return [list(range(year_start, year_end + 1)), *columns], ['year', *[f'C{i}' for i in range(countries)]]
+
+
+def build_app(columns, dimensions):
+    app = FastAPI()
+
+    @app.post("/old", response_model=OpenalexEchartsResponse)
+    async def old():
+        return {'data': list(zip(*columns)), 'dimensions': dimensions}
+
+    @app.post("/rows", response_model=OpenalexEchartsResponse)
+    async def rows():
+        return echarts_response(columns, dimensions)
+
+    @app.post("/columns", response_model=OpenalexEchartsResponse)
+    async def cols():
+        return echarts_response(columns, dimensions, 'columns')
+
+    return app
+
+
+async def measure(client, path, requests):
+    latencies = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.post(path)
+        latencies.append(time.perf_counter() - start)
+        size = len(response.content)
+    return latencies, size
+
+
+async def main(args):
+    columns, dimensions = dataset(args.countries)
+    transport = httpx.ASGITransport(app=build_app(columns, dimensions))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ['/old', '/rows', '/columns']:
+            await measure(client, path, 5)
+        for path in ['/old', '/rows', '/columns']:
+            latencies, size = await measure(client, path, args.requests)
+            print(f'{path:10} mean {statistics.mean(latencies) * 1000:7.3f}ms '
+                  f'p95 {sorted(latencies)[int(len(latencies) * 0.95)] * 1000:7.3f}ms  {size} bytes')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--countries', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
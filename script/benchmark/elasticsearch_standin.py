@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# 本地 Elasticsearch 替身，只实现 metapedia 用到的 _search / _msearch / _doc
+#
+#   uv run python script/benchmark/elasticsearch_standin.py --port 19200 --latency 0.02
+#   KNOGEN_ELASTICSEARCH_URL=http://127.0.0.1:19200 ...
+
+LATENCY = 0.0
+HEADERS = {'X-Elastic-Product': 'Elasticsearch'}
+
+app = FastAPI()
+
+
+def search_result(index: str, body: dict) -> dict:
+    match = body.get('query', {}).get('match', {})
+    field, text = next(iter(match.items()), ('title', ''))
+    hits = []
+    for i in range(body.get('size', 10)):
+        doc_id = abs(hash((index, text, i))) % 10**8
+        source = {'id': doc_id, 'title': f'{text} {i}', 'redirect': [], 'images': [f'img_{doc_id}.jpg']}
+        if index.startswith('zh'):
+            source['zh_title'] = f'{text} {i}'
+        hits.append({
+            '_index': index,
+            '_id': str(doc_id),
+            '_score': 1.0 / (i + 1),
+            '_source': {k: v for k, v in source.items() if k in body.get('_source', source)},
+            'highlight': {field: [f'<em>{text}</em> {i}']},
+        })
+    return {'took': 1, 'timed_out': False, 'hits': {'total': {'value': len(hits), 'relation': 'eq'}, 'hits': hits}}
+
+
+def reply(content: dict) -> JSONResponse:
+    return JSONResponse(content, headers=HEADERS)
+
+
+@app.get("/")
+async def info():
+    return reply({'version': {'number': '8.15.1'}, 'tagline': 'You Know, for Search'})
+
+
+@app.post("/_msearch")
+async def msearch(request: Request):
+    await asyncio.sleep(LATENCY)
+    lines = [json.loads(line) for line in (await request.body()).decode().splitlines() if line.strip()]
+    responses = [search_result(header['index'], body) for header, body in zip(lines[::2], lines[1::2])]
+    return reply({'took': 1, 'responses': responses})
+
+
+@app.post("/{index}/_search")
+async def search(index: str, request: Request):
+    await asyncio.sleep(LATENCY)
+    return reply(search_result(index, await request.json()))
+
+
+@app.get("/{index}/_doc/{doc_id}")
+async def get_doc(index: str, doc_id: str):
+    await asyncio.sleep(LATENCY)
+    return reply({'_index': index, '_id': doc_id, 'found': True,
+                  '_source': {'id': int(doc_id), 'title': f'page {doc_id}', 'text': 'synthetic page'}})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=19200)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args()
+    LATENCY = args.latency
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
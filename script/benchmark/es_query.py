@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from elasticsearch import Elasticsearch
+from fastapi.concurrency import run_in_threadpool
+
+# /metapedia/v1/query: 两次串行同步 search 与一次异步 msearch 的对比
+#
+#   PYTHONPATH=. uv run python script/benchmark/es_query.py --latency 0.02 --concurrency 50
+# 不给 --es-url 时自动启动本地 elasticsearch_standin.py
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(name, call, concurrency, requests):
+    latencies = []
+
+    async def worker(n):
+        for i in range(n):
+            start = time.perf_counter()
+            await call(f'query {i % 20}')
+            latencies.append(time.perf_counter() - start)
+
+    await call('warm up')
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(requests // concurrency) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {len(latencies) / elapsed:8.1f} req/s  p50 {statistics.median(latencies) * 1000:7.2f} ms"
+          f"  p95 {percentile(latencies, 0.95) * 1000:7.2f} ms")
+
+
+async def main(args):
+    from app.routers import metapedia_v1
+
+    es_sync = Elasticsearch(args.es_url)
+
+    def sequential_search(query):
+        en, zh = metapedia_v1.query_searches(query)[1::2]
+        es_sync.search(index="en_page", body=en)
+        es_sync.search(index="zh_page", body=zh)
+
+    async def old(query):
+        await run_in_threadpool(sequential_search, query)
+
+    async def new(query):
+        await metapedia_v1.bake_query(metapedia_v1.BaikeDemoQueryRequests(query=query, namespace=0))
+
+    await run('2x search', old, args.concurrency, args.requests)
+    await run('msearch', new, args.concurrency, args.requests)
+    await metapedia_v1.ES8.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--es-url')
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    standin = None
+    if not args.es_url:
+        args.es_url = "http://127.0.0.1:19200"
+        standin = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__), 'elasticsearch_standin.py'),
+                                    '--port', '19200', '--latency', str(args.latency)])
+        time.sleep(2)
+    os.environ["KNOGEN_ELASTICSEARCH_URL"] = args.es_url
+    try:
+        asyncio.run(main(args))
+    finally:
+        if standin:
+            standin.terminate()
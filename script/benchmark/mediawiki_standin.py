@@ -0,0 +1,36 @@
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI
+
+# 本地 MediaWiki API 替身，只实现 summary 用到的 action=query&prop=extracts
+#
+#   uv run python script/benchmark/mediawiki_standin.py --port 18080 --latency 0.2
+#   KNOGEN_WIKIPEDIA_API_URL=http://127.0.0.1:18080/{lang}/w/api.php KNOGEN_WIKIPEDIA_PROXY= ...
+
+LATENCY = 0.0
+
+app = FastAPI()
+
+
+@app.get("/{lang}/w/api.php")
+async def api(lang: str, titles: str, action: str = "query"):
+    await asyncio.sleep(LATENCY)
+    pages = []
+    for title in titles.split('|'):
+        if title.startswith('Missing'):
+            pages.append({'ns': 0, 'title': title, 'missing': True})
+        else:
+            pages.append({'pageid': abs(hash(title)) % 10**8, 'ns': 0, 'title': title,
+                          'extract': f'{title} ({lang}) is a synthetic summary. ' * 5})
+    return {'batchcomplete': True, 'query': {'pages': pages}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args()
+    LATENCY = args.latency
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
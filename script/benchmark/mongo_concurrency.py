@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+import pymongo
+from fastapi import FastAPI
+from pymongo import AsyncMongoClient
+
+# 对比 sync 端点 (threadpool + pymongo) 与 async 端点 (AsyncMongoClient) 的并发吞吐
+#
+#   uv run python script/benchmark/mongo_concurrency.py --uri mongodb://localhost:27017 \
+#       --db openalex --collection country_google_distance_v2 --concurrency 200
+
+
+def build_sync_app(uri, db, collection):
+    app = FastAPI()
+    coll = pymongo.MongoClient(uri).get_database(db)[collection]
+
+    @app.get("/doc")
+    def get_doc():
+        doc = coll.find_one({}, {'_id': 1})
+        return {'ok': doc is not None}
+
+    return app
+
+
+def build_async_app(uri, db, collection):
+    app = FastAPI()
+    coll = AsyncMongoClient(uri).get_database(db)[collection]
+
+    @app.get("/doc")
+    async def get_doc():
+        doc = await coll.find_one({}, {'_id': 1})
+        return {'ok': doc is not None}
+
+    return app
+
+
+async def drive(app, concurrency, requests):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get("/doc")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        # warm up the connection pool
+        await client.get("/doc")
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': requests / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--uri', default="mongodb://localhost:27017")
+    parser.add_argument('--db', default="openalex")
+    parser.add_argument('--collection', default="country_google_distance_v2")
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    for name, factory in [('sync', build_sync_app), ('async', build_async_app)]:
+        app = factory(args.uri, args.db, args.collection)
+        result = asyncio.run(drive(app, args.concurrency, args.requests))
+        print(f"{name:>5}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import string
+import time
+from urllib.parse import urlparse
+
+import pymongo
+
+from app import category_stats, page_profile
+from app.category_graph import CategoryGraph
+from app.distance_store import DistanceStore
+from app.prefix_index import PrefixIndex
+from app.routers.openalex import concept_id_name_map
+from app.works_cube import WorksCube
+
+# 往本地 mongod 写入合成数据，代替 192.168.1.227 上的 baike_demo / openalex 库:
+# {lang}_page / _categorylinks / _redirect / _langlinks, baidu_baike_page,
+# country_google_distance(_concept)_v2, works_count_by_country,
+# 再生成 page_profile / category_stats 以及分类图、前缀索引、距离张量、works cube 快照
+#
+#   PYTHONPATH=. uv run python script/benchmark/seed_standins.py --uri mongodb://127.0.0.1:27017 --pages 100000
+#
+# 会先删除这几个库，默认只允许本机地址
+
+DATABASES = ['baike_demo', 'openalex', 'wikipedia_cache']
+LANGS = ['en', 'zh']
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ra', 'to', 'su', 'vi', 'de', 'an', 'or', 'el', 'bu', 'ti', 'sa', 'mo']
+TYPES = ['article', 'book', 'book-chapter', 'dataset', 'dissertation', 'standard', 'report-series', 'reference-entry', '']
+BATCH_SIZE = 10000
+
+
+def word(rng: random.Random) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def hanzi(rng: random.Random) -> str:
+    return ''.join(chr(0x4e00 + rng.randrange(3000)) for _ in range(rng.randint(2, 4)))
+
+
+def page_title(rng: random.Random, lang: str, i: int) -> str:
+    if lang == 'en':
+        return f'{word(rng).capitalize()}_{word(rng)}_{i}'
+    return f'{hanzi(rng)}{i}'
+
+
+def category_title(rng: random.Random, lang: str, i: int) -> str:
+    if lang == 'en':
+        return f'{word(rng).capitalize()}_{word(rng)}_topics_{i}'
+    return f'{hanzi(rng)}类{i}'
+
+
+def insert(collection, docs):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def seed_baike(database, pages: int, rng: random.Random) -> dict:
+    """wikipedia-like dump collections of both languages, page i of en and zh are langlinked
+
+    ids: articles 1..pages, then redirects, categories and files. Categories
+    form a DAG under category 0, article membership is skewed so the categories
+    near the root are big.
+    """
+    categories = max(10, pages // 25)
+    redirects = pages // 5
+    files = pages // 10
+    redirect_start = pages + 1
+    category_start = redirect_start + redirects
+    file_start = category_start + categories
+
+    titles = {lang: [page_title(rng, lang, i) for i in range(pages)] for lang in LANGS}
+    vocab = {}
+    for lang in LANGS:
+        other = 'zh' if lang == 'en' else 'en'
+        article_titles = titles[lang]
+        category_titles = [category_title(rng, lang, i) for i in range(categories)]
+        redirect_targets = [rng.randrange(pages) for _ in range(redirects)]
+        redirect_titles = [f'{article_titles[target]}_alias_{i}' for i, target in enumerate(redirect_targets)]
+
+        def page_docs():
+            for i, title in enumerate(article_titles):
+                yield {'_id': i + 1, 'namespace': 0, 'title': title, 'f_title': title.replace('_', ' '),
+                       'is_redirect': 0, 'len': rng.randint(200, 200000)}
+            for i, title in enumerate(redirect_titles):
+                yield {'_id': redirect_start + i, 'namespace': 0, 'title': title, 'f_title': title.replace('_', ' '),
+                       'is_redirect': 1, 'len': rng.randint(20, 80)}
+            for i, title in enumerate(category_titles):
+                yield {'_id': category_start + i, 'namespace': 14, 'title': title, 'f_title': title.replace('_', ' '),
+                       'is_redirect': 0, 'len': rng.randint(100, 5000)}
+            for i in range(files):
+                title = f'File_{i}.jpg'
+                yield {'_id': file_start + i, 'namespace': 6, 'title': title, 'f_title': title.replace('_', ' '),
+                       'is_redirect': 0, 'len': rng.randint(100, 5000)}
+
+        def redirect_docs():
+            for i, target in enumerate(redirect_targets):
+                yield {'_id': redirect_start + i, 'from': redirect_start + i, 'namespace': 0, 'title': article_titles[target]}
+
+        def categorylinks_docs():
+            for i in range(1, categories):
+                for parent in {rng.randrange(i) for _ in range(1 if rng.random() < 0.7 else 2)}:
+                    yield {'from': category_start + i, 'to': category_titles[parent], 'type': 'subcat'}
+            for i in range(pages):
+                for category in {int(categories * rng.random() ** 3) for _ in range(rng.randint(1, 3))}:
+                    yield {'from': i + 1, 'to': category_titles[category], 'type': 'page'}
+            for i in range(files):
+                yield {'from': file_start + i, 'to': category_titles[int(categories * rng.random() ** 2)], 'type': 'file'}
+
+        def langlinks_docs():
+            for i in range(0, pages, 2):
+                yield {'from': i + 1, 'lang': other, 'title': titles[other][i]}
+
+        insert(database[f'{lang}_page'], page_docs())
+        insert(database[f'{lang}_redirect'], redirect_docs())
+        insert(database[f'{lang}_categorylinks'], categorylinks_docs())
+        insert(database[f'{lang}_langlinks'], langlinks_docs())
+
+        database[f'{lang}_page'].create_index([('title', pymongo.ASCENDING)])
+        database[f'{lang}_page'].create_index([('f_title', pymongo.ASCENDING)])
+        database[f'{lang}_page'].create_index([('namespace', pymongo.ASCENDING)])
+        if lang == 'en':
+            database[f'{lang}_page'].create_index([('title', pymongo.TEXT)])
+        database[f'{lang}_redirect'].create_index([('title', pymongo.ASCENDING)])
+        database[f'{lang}_redirect'].create_index([('from', pymongo.ASCENDING)])
+        database[f'{lang}_categorylinks'].create_index([('from', pymongo.ASCENDING)])
+        database[f'{lang}_categorylinks'].create_index([('to', pymongo.ASCENDING), ('type', pymongo.ASCENDING), ('from', pymongo.ASCENDING)])
+        database[f'{lang}_langlinks'].create_index([('from', pymongo.ASCENDING), ('lang', pymongo.ASCENDING)])
+
+        sample = rng.sample(range(pages), min(pages, 2000))
+        vocab[lang] = {
+            'titles': [article_titles[i] for i in sample],
+            'ids': [i + 1 for i in sample],
+            'redirects': rng.sample(redirect_titles, min(redirects, 500)),
+            # the 20 biggest plus a spread of small ones
+            'categories': category_titles[:20] + rng.sample(category_titles, min(categories, 500)),
+            'prefixes': sorted({title[:3] for title in rng.sample(article_titles, min(pages, 500))}),
+        }
+
+    now = datetime.datetime.now()
+    insert(database.baidu_baike_page, (
+        {'title': title, 'ok': True, 'data': {'title': title, 'summary': f'{title} synthetic baike entry'}, 'update': now}
+        for title in titles['zh'][::5]
+    ))
+    database.baidu_baike_page.create_index([('title', pymongo.ASCENDING), ('update', pymongo.DESCENDING)])
+    return vocab
+
+
+def seed_openalex(database, countries: int, rng: random.Random) -> dict:
+    """distance v2 collections over all sorted country pairs, and works counts"""
+    names = ['CN', 'UK', 'US']
+    names += rng.sample(sorted({a + b for a in string.ascii_uppercase for b in string.ascii_uppercase} - set(names)),
+                        max(0, countries - len(names)))
+    names = sorted(names[:max(countries, 2)])
+    concepts = sorted(concept_id_name_map)
+    start_year, end_year = 1960, 2022
+
+    def distances():
+        return [rng.random() * 1.2 if rng.random() > 0.1 else math.nan for _ in range(end_year - start_year + 1)]
+
+    insert(database.country_google_distance_v2, (
+        {'a': a, 'b': b, 'start_year': start_year, 'end_year': end_year, 'd_total': distances()}
+        for i, a in enumerate(names) for b in names[i + 1:]
+    ))
+    insert(database.country_google_distance_concept_v2, (
+        {'a': a, 'b': b, 'ac': ac, 'bc': bc, 'start_year': start_year, 'end_year': end_year, 'd_total': distances()}
+        for i, a in enumerate(names) for b in names[i:] for ac in concepts for bc in concepts
+    ))
+    insert(database.works_count_by_country, (
+        {'n': n, 't': t, 'y': y, 'c': rng.randint(0, 100000)}
+        for n in [None, *names] for t in TYPES for y in range(1920, 2023)
+    ))
+    database.country_google_distance_v2.create_index([('a', pymongo.ASCENDING), ('b', pymongo.ASCENDING)])
+    database.country_google_distance_concept_v2.create_index(
+        [('a', pymongo.ASCENDING), ('b', pymongo.ASCENDING), ('ac', pymongo.ASCENDING), ('bc', pymongo.ASCENDING)])
+    database.works_count_by_country.create_index([('n', pymongo.ASCENDING), ('t', pymongo.ASCENDING), ('y', pymongo.ASCENDING)])
+    return {'countries': names, 'subjects': concepts, 'types': [t or 'UNKNOW' for t in TYPES]}
+
+
+def build_derived(client, data_dir: str):
+    """the precomputed collections and the snapshot directories the app loads at startup"""
+    baike = client.get_database('baike_demo')
+    openalex = client.get_database('openalex')
+    for lang in LANGS:
+        page_profile.build(baike, lang)
+        category_stats.build(baike, lang)
+        CategoryGraph.build_from_mongo(baike, lang).save(os.path.join(data_dir, 'category_graph', lang))
+        for namespace in [0, 14]:
+            PrefixIndex.build_from_mongo(baike, lang, namespace).save(os.path.join(data_dir, 'prefix_index', f'{lang}_{namespace}'))
+    DistanceStore.export(openalex, os.path.join(data_dir, 'openalex_distance'))
+    WorksCube.build_from_mongo(openalex).save(os.path.join(data_dir, 'works_cube'))
+
+
+def seed(uri: str, data_dir: str, pages: int, countries: int, seed: int = 0) -> dict:
+    """drop and refill the stand-in databases, returns the vocabulary the benchmark draws requests from"""
+    rng = random.Random(seed)
+    client = pymongo.MongoClient(uri)
+    for name in DATABASES:
+        client.drop_database(name)
+
+    start = time.time()
+    vocab = seed_baike(client.get_database('baike_demo'), pages, rng)
+    print('baike_demo', pages, 'pages per lang', f'{time.time() - start:.1f}s')
+    start = time.time()
+    vocab['openalex'] = seed_openalex(client.get_database('openalex'), countries, rng)
+    print('openalex', len(vocab['openalex']['countries']), 'countries', f'{time.time() - start:.1f}s')
+    start = time.time()
+    build_derived(client, data_dir)
+    print('derived collections and snapshots', f'{time.time() - start:.1f}s')
+    client.close()
+
+    vocab['scale'] = {'pages': pages, 'countries': countries, 'seed': seed}
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, 'vocab.json'), 'w') as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    return vocab
+
+
+def check_local(uri: str):
+    host = urlparse(uri).hostname
+    if host not in ('localhost', '127.0.0.1', '::1'):
+        raise SystemExit(f'refusing to drop {", ".join(DATABASES)} on {host}, pass --force for a non-local stand-in')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--uri', default='mongodb://127.0.0.1:27017')
+    parser.add_argument('--data-dir', default='data/benchmark')
+    parser.add_argument('--pages', type=int, default=100000, help='articles per language')
+    parser.add_argument('--countries', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--force', action='store_true', help='allow a non-local mongo')
+    args = parser.parse_args()
+    if not args.force:
+        check_local(args.uri)
+    seed(args.uri, args.data_dir, args.pages, args.countries, args.seed)
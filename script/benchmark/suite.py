@@ -0,0 +1,398 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+
+import seed_standins
+from app.routers.metapedia_v1 import encode_after
+
+# 全部路由的离线压测: 本地 mongod + 合成数据 + elasticsearch / mediawiki 替身，
+# uvicorn 子进程启动 app.main:app，并发客户端逐个端点测 p50/p95/p99 和 req/s，
+# 可保存为基线并与之前的基线对比
+#
+#   PYTHONPATH=. uv run python script/benchmark/suite.py --uri mongodb://127.0.0.1:27017 --save data/benchmark/baseline.json
+#   PYTHONPATH=. uv run python script/benchmark/suite.py --baseline data/benchmark/baseline.json
+#
+# 第一次运行 (或 --reseed) 时先执行 seed_standins.py 的灌数; --fallback 不加载快照，测 mongo 回退路径
+# (此时 category_path 需要 neo4j，跳过)。不测写入与清理类端点: PUT baidu_baike, DELETE /stats/*
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # (rng, vocab) -> httpx request kwargs
+    make: Callable[[random.Random, dict], dict]
+    needs_snapshots: bool = False
+
+
+def lang_title(rng, vocab, key='titles'):
+    lang = rng.choice(['en', 'zh'])
+    return lang, rng.choice(vocab[lang][key])
+
+
+def page(rng, vocab):
+    # one in five through a redirect
+    lang, title = lang_title(rng, vocab, 'redirects' if rng.random() < 0.2 else 'titles')
+    return {'title': title, 'lang': lang}
+
+
+def pages(rng, vocab):
+    lang = rng.choice(['en', 'zh'])
+    return {'titles': rng.sample(vocab[lang]['titles'], 10), 'lang': lang}
+
+
+def category(rng, vocab):
+    lang, title = lang_title(rng, vocab, 'categories')
+    return {'title': title, 'lang': lang}
+
+
+def category_page(rng, vocab):
+    lang, title = lang_title(rng, vocab, 'categories')
+    return {'title': title, 'lang': lang, 'after': encode_after(rng.choice(vocab[lang]['ids']))}
+
+
+def category_path(rng, vocab):
+    lang = rng.choice(['en', 'zh'])
+    source, target = rng.sample(vocab[lang]['categories'], 2)
+    return {'lang': lang, 'source': source, 'target': target}
+
+
+def distance(rng, vocab):
+    countries = vocab['openalex']['countries']
+    return {'countryA': rng.choice(countries), 'countryB': rng.sample(countries, min(len(countries), 5))}
+
+
+def subject_distance(rng, vocab):
+    subjects = vocab['openalex']['subjects']
+    return {**distance(rng, vocab), 'subjectA': rng.choice(subjects), 'subjectB': rng.choice(subjects)}
+
+
+def works_count(rng, vocab):
+    openalex = vocab['openalex']
+    return {'countries': rng.sample(openalex['countries'], min(len(openalex['countries']), 5)) + ['UNKNOW'],
+            'typenames': rng.sample(openalex['types'], 3)}
+
+
+def force(rng, vocab):
+    openalex = vocab['openalex']
+    return {'countries': rng.sample(openalex['countries'], min(len(openalex['countries']), 8)),
+            'subjects': rng.sample(openalex['subjects'], 4)}
+
+
+def summary(rng, vocab):
+    lang, title = lang_title(rng, vocab)
+    return {'title': title.replace('_', ' '), 'lang': lang}
+
+
+def summaries(rng, vocab):
+    lang = rng.choice(['en', 'zh'])
+    return {'titles': [title.replace('_', ' ') for title in rng.sample(vocab[lang]['titles'], 10)], 'lang': lang}
+
+
+def query(rng, vocab):
+    return rng.choice(vocab[rng.choice(['en', 'zh'])]['prefixes'])
+
+
+def json_body(make):
+    return lambda rng, vocab: {'json': make(rng, vocab)}
+
+
+def query_params(make):
+    return lambda rng, vocab: {'params': make(rng, vocab)}
+
+
+def fixed(**kwargs):
+    return lambda rng, vocab: kwargs
+
+
+SCENARIOS = [
+    Scenario('root', 'GET', '/', fixed()),
+    # openalex
+    Scenario('openalex googledistance', 'POST', '/openalex/googledistance', json_body(distance)),
+    Scenario('openalex googledistance GET', 'GET', '/openalex/googledistance', query_params(distance)),
+    Scenario('openalex googledistance_subject', 'POST', '/openalex/googledistance_subject', json_body(subject_distance)),
+    Scenario('openalex googledistance_subject GET', 'GET', '/openalex/googledistance_subject', query_params(subject_distance)),
+    Scenario('openalex countryworkscount', 'POST', '/openalex/countryworkscount', json_body(works_count)),
+    Scenario('openalex countryworkscount GET', 'GET', '/openalex/countryworkscount', query_params(works_count)),
+    Scenario('openalex force', 'POST', '/openalex/force_distance_country_subject', json_body(force)),
+    Scenario('openalex force GET', 'GET', '/openalex/force_distance_country_subject', query_params(force)),
+    # metapedia
+    Scenario('metapedia query', 'POST', '/metapedia/v1/query',
+             lambda rng, vocab: {'json': {'query': query(rng, vocab), 'namespace': 0}}),
+    Scenario('metapedia page', 'POST', '/metapedia/v1/page', json_body(page)),
+    Scenario('metapedia page GET', 'GET', '/metapedia/v1/page', query_params(page)),
+    Scenario('metapedia pages', 'POST', '/metapedia/v1/pages', json_body(pages)),
+    Scenario('metapedia pages GET', 'GET', '/metapedia/v1/pages', query_params(pages)),
+    Scenario('metapedia lately_search', 'GET', '/metapedia/v1/lately_search', fixed()),
+    Scenario('metapedia category', 'POST', '/metapedia/v1/category', json_body(category)),
+    Scenario('metapedia category GET', 'GET', '/metapedia/v1/category', query_params(category)),
+    Scenario('metapedia category_page', 'POST', '/metapedia/v1/category_page', json_body(category_page)),
+    Scenario('metapedia category_page GET', 'GET', '/metapedia/v1/category_page', query_params(category_page)),
+    Scenario('metapedia category_export', 'POST', '/metapedia/v1/category_export',
+             lambda rng, vocab: {'json': {**category(rng, vocab), 'depth': 1}}),
+    Scenario('metapedia category_path', 'POST', '/metapedia/v1/category_path', json_body(category_path), needs_snapshots=True),
+    Scenario('metapedia category_path GET', 'GET', '/metapedia/v1/category_path', query_params(category_path), needs_snapshots=True),
+    Scenario('metapedia wiki_page_detail', 'POST', '/metapedia/v1/wiki_page_detail',
+             lambda rng, vocab: {'json': {'lang': 'zh', 'id': rng.choice(vocab['zh']['ids'])}}),
+    Scenario('metapedia baidu_baike', 'POST', '/metapedia/v1/baidu_baike',
+             lambda rng, vocab: {'json': {'title': rng.sample(vocab['zh']['titles'], 3)}}),
+    # baike_demo
+    Scenario('baike_demo query', 'POST', '/baike_demo/query',
+             lambda rng, vocab: {'json': {'query': query(rng, vocab), 'namespace': 0}}),
+    Scenario('baike_demo page', 'POST', '/baike_demo/page',
+             lambda rng, vocab: {'json': {'id': rng.choice(vocab['en']['ids']), 'lang': 'en'}}),
+    Scenario('baike_demo lately_search', 'GET', '/baike_demo/lately_search', fixed()),
+    # wikipedia, served by the mediawiki stand-in then the mongo cache
+    Scenario('wikipedia summary', 'POST', '/wikipedia/summary', json_body(summary)),
+    Scenario('wikipedia summaries', 'POST', '/wikipedia/summaries', json_body(summaries)),
+    # stats
+    Scenario('stats neo4j', 'GET', '/stats/neo4j', fixed()),
+    Scenario('stats cache', 'GET', '/stats/cache', fixed()),
+    Scenario('stats shared_cache', 'GET', '/stats/shared_cache', fixed()),
+    Scenario('stats compression', 'GET', '/stats/compression', fixed()),
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, vocab: dict, args) -> dict:
+    """args.requests requests over args.concurrency clients, each drawing from args.keys distinct requests"""
+    rng = random.Random(args.seed)
+    pool = [scenario.make(rng, vocab) for _ in range(args.keys)]
+    latencies, errors, size = [], 0, 0
+
+    async def call():
+        nonlocal errors, size
+        kwargs = rng.choice(pool)
+        start = time.perf_counter()
+        try:
+            response = await client.request(scenario.method, scenario.path, **kwargs)
+            body = await response.aread()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            body, ok = b'', False
+        latencies.append(time.perf_counter() - start)
+        if ok:
+            size += len(body)
+        else:
+            errors += 1
+
+    for _ in range(args.warmup):
+        await call()
+    latencies.clear()
+    errors = size = 0
+
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_bytes': size // max(1, len(latencies) - errors),
+    }
+
+
+def print_result(name: str, result: dict):
+    print(f"{name:38} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}"
+          f"  p99 {result['p99_ms']:8.2f} ms  {result['errors']:4} err  {result['mean_bytes']:8} B", flush=True)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """names of the scenarios that lost more than threshold of req/s or p95 latency"""
+    print(f"\n{'vs baseline':38} {'req/s':>9}  {'p50':>8}  {'p95':>8}  {'p99':>8}")
+    regressions = []
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if not old:
+            continue
+
+        def change(key):
+            return (result[key] - old[key]) / old[key] if old[key] else 0.0
+
+        rps, p50, p95, p99 = change('rps'), change('p50_ms'), change('p95_ms'), change('p99_ms')
+        # p99 of a few hundred requests is too noisy to fail a run on, and so
+        # is a p95 that moved by less than a millisecond
+        slower = p95 > threshold and result['p95_ms'] - old['p95_ms'] > 1
+        regressed = rps < -threshold or slower or result['errors'] > old['errors']
+        if regressed:
+            regressions.append(name)
+        print(f"{name:38} {rps:+9.1%}  {p50:+8.1%}  {p95:+8.1%}  {p99:+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def start_process(command: list[str], env: dict | None = None) -> subprocess.Popen:
+    return subprocess.Popen(command, cwd=ROOT, env={**os.environ, **(env or {})})
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'{url} exited with {process.returncode}')
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f'{url} not ready after {timeout}s')
+
+
+def app_env(args) -> dict:
+    data = os.path.abspath(args.data_dir)
+    # a missing directory makes every loader fall back to mongo
+    snapshots = os.path.join(data, 'none') if args.fallback else data
+    return {
+        'PYTHONPATH': ROOT,
+        'KNOGEN_MONGO_URI': args.uri,
+        'KNOGEN_ELASTICSEARCH_URL': f'http://127.0.0.1:{args.es_port}',
+        'KNOGEN_WIKIPEDIA_API_URL': f'http://127.0.0.1:{args.wiki_port}/{{lang}}/w/api.php',
+        'KNOGEN_WIKIPEDIA_PROXY': '',
+        # nothing listens there, only used by category_path without a graph snapshot
+        'KNOGEN_NEO4J_URI': 'bolt://127.0.0.1:7687',
+        'KNOGEN_CATEGORY_GRAPH_DIR': os.path.join(snapshots, 'category_graph'),
+        'KNOGEN_PREFIX_INDEX_DIR': os.path.join(snapshots, 'prefix_index'),
+        'KNOGEN_DISTANCE_STORE_DIR': os.path.join(snapshots, 'openalex_distance'),
+        'KNOGEN_WORKS_CUBE_DIR': os.path.join(snapshots, 'works_cube'),
+        'KNOGEN_WORKS_CUBE_BUILD': '0',
+        'KNOGEN_CATEGORY_GRAPH_BUILD': '0',
+        'KNOGEN_PREFIX_INDEX_BUILD': '0',
+        'KNOGEN_SHARED_CACHE_PATH': os.path.join(data, 'shared_cache', 'cache.sqlite'),
+    }
+
+
+async def drive(args, vocab: dict, base_url: str) -> dict:
+    scenarios = [s for s in SCENARIOS if not args.only or any(name in s.name for name in args.only)]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {'Accept-Encoding': args.accept_encoding}
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout, headers=headers) as client:
+        for scenario in scenarios:
+            if scenario.needs_snapshots and args.fallback:
+                print(f'{scenario.name:38} skipped, needs neo4j without the graph snapshot')
+                continue
+            results[scenario.name] = await run_scenario(client, scenario, vocab, args)
+            print_result(scenario.name, results[scenario.name])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--uri', default='mongodb://127.0.0.1:27017', help='local mongod holding the stand-in data')
+    parser.add_argument('--data-dir', default='data/benchmark', help='vocab.json, snapshots and the shared cache')
+    parser.add_argument('--reseed', action='store_true', help='drop and seed the stand-in databases again')
+    parser.add_argument('--pages', type=int, default=100000, help='articles per language when seeding')
+    parser.add_argument('--countries', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--force', action='store_true', help='allow seeding a non-local mongo')
+    parser.add_argument('--url', help='benchmark a running server instead of starting uvicorn')
+    parser.add_argument('--port', type=int, default=18000)
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn workers')
+    parser.add_argument('--fallback', action='store_true', help='start without snapshots, measure the mongo paths')
+    parser.add_argument('--es-port', type=int, default=19200)
+    parser.add_argument('--es-latency', type=float, default=0.005)
+    parser.add_argument('--wiki-port', type=int, default=18080)
+    parser.add_argument('--wiki-latency', type=float, default=0.05)
+    parser.add_argument('--only', action='append', help='run the scenarios whose name contains this, repeatable')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500, help='per scenario')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--keys', type=int, default=200, help='distinct requests per scenario, fewer means warmer caches')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--accept-encoding', default='gzip, br, zstd')
+    parser.add_argument('--save', help='write the results as a baseline json')
+    parser.add_argument('--baseline', help='compare with a saved baseline, exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative loss of req/s or p95')
+    args = parser.parse_args()
+
+    vocab_path = os.path.join(args.data_dir, 'vocab.json')
+    if args.reseed or not os.path.exists(vocab_path):
+        if not args.force:
+            seed_standins.check_local(args.uri)
+        seed_standins.seed(args.uri, args.data_dir, args.pages, args.countries, args.seed)
+    with open(vocab_path) as f:
+        vocab = json.load(f)
+
+    processes = []
+    try:
+        base_url = args.url
+        if not base_url:
+            processes.append(start_process([sys.executable, os.path.join(HERE, 'elasticsearch_standin.py'),
+                                            '--port', str(args.es_port), '--latency', str(args.es_latency)]))
+            processes.append(start_process([sys.executable, os.path.join(HERE, 'mediawiki_standin.py'),
+                                            '--port', str(args.wiki_port), '--latency', str(args.wiki_latency)]))
+            wait_ready(f'http://127.0.0.1:{args.es_port}/', processes[0])
+            wait_ready(f'http://127.0.0.1:{args.wiki_port}/', processes[1])
+            # every run starts with an empty shared cache
+            shutil.rmtree(os.path.join(args.data_dir, 'shared_cache'), ignore_errors=True)
+            os.makedirs(os.path.join(args.data_dir, 'shared_cache'))
+            base_url = f'http://127.0.0.1:{args.port}'
+            processes.append(start_process([
+                sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(args.port),
+                '--workers', str(args.workers), '--log-level', 'warning',
+            ], app_env(args)))
+            wait_ready(base_url + '/', processes[-1])
+        results = asyncio.run(drive(args, vocab, base_url))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({
+                'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                'git': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                      capture_output=True, text=True).stdout.strip(),
+                'args': {key: value for key, value in vars(args).items() if key not in ('save', 'baseline')},
+                'scale': vocab.get('scale'),
+                'results': results,
+            }, f, indent=2, ensure_ascii=False)
+        print('saved', args.save)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != vocab.get('scale'):
+            print('baseline was taken at another scale', baseline.get('scale'))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(len(regressions), 'regressions')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
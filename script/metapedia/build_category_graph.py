@@ -0,0 +1,26 @@
+import argparse
+import os
+import time
+
+import pymongo
+
+from app import config
+from app.category_graph import CategoryGraph
+
+# 从 {lang}_page / {lang}_categorylinks 构建分类图快照，服务启动时 mmap 加载
+#
+#   PYTHONPATH=. uv run python script/metapedia/build_category_graph.py --lang zh
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--lang', action='append', choices=['en', 'zh'])
+parser.add_argument('--uri', default=config.MONGO_URI)
+parser.add_argument('--out', default=config.CATEGORY_GRAPH_DIR)
+args = parser.parse_args()
+
+database = pymongo.MongoClient(args.uri).get_database("baike_demo")
+
+for lang in args.lang or ['en', 'zh']:
+    start = time.time()
+    graph = CategoryGraph.build_from_mongo(database, lang)
+    graph.save(os.path.join(args.out, lang))
+    print(lang, 'nodes', len(graph), 'edges', len(graph.up_indices), f'{time.time() - start:.1f}s')
@@ -0,0 +1,54 @@
+import argparse
+import json
+import sys
+import time
+
+import pymongo
+
+from app import category_stats, config
+
+# 统计每个分类的 page / subcat / file 数量写入 {lang}_category_stats，/category 直接读取
+#
+#   全量:  PYTHONPATH=. uv run python script/metapedia/build_category_stats.py --lang zh
+#   增量:  PYTHONPATH=. uv run python script/metapedia/build_category_stats.py --lang zh --deltas changes.ndjson
+#          changes.ndjson 每行一个 categorylinks 变更 {"op": "insert"|"delete", "to": "...", "type": "page"}
+#   校正:  PYTHONPATH=. uv run python script/metapedia/build_category_stats.py --lang zh --recount 分类A 分类B
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--lang', action='append', choices=['en', 'zh'])
+parser.add_argument('--deltas', help="ndjson file of categorylinks changes, '-' for stdin")
+parser.add_argument('--recount', nargs='+', help="categories to count again exactly")
+parser.add_argument('--batch-size', type=int, default=10000)
+parser.add_argument('--uri', default=config.MONGO_URI)
+args = parser.parse_args()
+langs = args.lang or ['en', 'zh']
+if (args.deltas or args.recount) and len(langs) != 1:
+    parser.error('--deltas and --recount need exactly one --lang')
+
+database = pymongo.MongoClient(args.uri).get_database("baike_demo")
+
+
+def read_events(path):
+    with (sys.stdin if path == '-' else open(path, encoding='utf-8')) as f:
+        batch = []
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= args.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+for lang in langs:
+    start = time.time()
+    if args.deltas:
+        total = sum(category_stats.apply(database, lang, events) for events in read_events(args.deltas))
+        print(lang, 'categories updated', total, f'{time.time() - start:.1f}s')
+    elif args.recount:
+        total = category_stats.recount(database, lang, args.recount)
+        print(lang, 'categories recounted', total, f'{time.time() - start:.1f}s')
+    else:
+        total = category_stats.build(database, lang)
+        print(lang, 'categories', total, f'{time.time() - start:.1f}s')
@@ -0,0 +1,40 @@
+import argparse
+import sys
+import time
+
+import pymongo
+
+from app import config, page_profile
+
+# 预计算每个 namespace 0 页面的 MetapediaPageItem 写入 page_profile，get_page 一次 find_one 即可
+#
+#   全量:  PYTHONPATH=. uv run python script/metapedia/build_page_profile.py --lang zh
+#   增量:  PYTHONPATH=. uv run python script/metapedia/build_page_profile.py --lang zh --ids 123 456
+#          cat changed_ids.txt | PYTHONPATH=. uv run python script/metapedia/build_page_profile.py --lang zh --ids -
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--lang', action='append', choices=page_profile.LANGS)
+parser.add_argument('--ids', nargs='+', help="changed page ids, '-' reads them from stdin")
+parser.add_argument('--batch-size', type=int, default=1000)
+parser.add_argument('--uri', default=config.MONGO_URI)
+args = parser.parse_args()
+
+database = pymongo.MongoClient(args.uri).get_database("baike_demo")
+
+
+def progress(lang, total):
+    if total % 100000 < args.batch_size:
+        print(lang, total, f'{time.time() - start:.1f}s')
+
+
+ids = None
+if args.ids:
+    ids = [int(i) for i in (sys.stdin.read().split() if args.ids == ['-'] else args.ids)]
+
+for lang in args.lang or page_profile.LANGS:
+    start = time.time()
+    if ids:
+        total = page_profile.refresh(database, lang, ids, args.batch_size)
+    else:
+        total = page_profile.build(database, lang, args.batch_size, progress)
+    print(lang, 'profiles', total, f'{time.time() - start:.1f}s')
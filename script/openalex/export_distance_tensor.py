@@ -0,0 +1,21 @@
+import argparse
+import time
+
+import pymongo
+
+from app import config
+from app.distance_store import DistanceStore
+
+# 导出 country_google_distance_v2 / country_google_distance_concept_v2 为 mmap 张量
+#
+#   PYTHONPATH=. uv run python script/openalex/export_distance_tensor.py
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--uri', default=config.MONGO_URI)
+parser.add_argument('--out', default=config.DISTANCE_STORE_DIR)
+args = parser.parse_args()
+
+start = time.time()
+store = DistanceStore.export(pymongo.MongoClient(args.uri).get_database("openalex"), args.out)
+print('countries', len(store.countries), 'concepts', len(store.concepts),
+      'years', store.start_year, store.end_year, f'{time.time() - start:.1f}s')
@@ -0,0 +1,22 @@
+import argparse
+import time
+
+import pymongo
+
+from app import config
+from app.works_cube import WorksCube
+
+# 导出 works_count_by_country 为 (country, type, year) 数组快照，服务启动时直接加载
+#
+#   PYTHONPATH=. uv run python script/openalex/export_works_cube.py
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--uri', default=config.MONGO_URI)
+parser.add_argument('--out', default=config.WORKS_CUBE_DIR)
+args = parser.parse_args()
+
+start = time.time()
+cube = WorksCube.build_from_mongo(pymongo.MongoClient(args.uri).get_database("openalex"))
+cube.save(args.out)
+print('countries', len(cube.countries), 'types', len(cube.types),
+      'years', cube.start_year, cube.end_year, f'{time.time() - start:.1f}s')
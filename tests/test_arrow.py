@@ -0,0 +1,69 @@
+import pytest
+
+from app import arrow
+
+pytest.importorskip('pyarrow')
+
+
+def test_negotiate_keeps_json_by_default():
+    assert arrow.negotiate(None) is None
+    assert arrow.negotiate('*/*') is None
+    assert arrow.negotiate('application/json') is None
+
+
+def test_negotiate_follows_q_values():
+    assert arrow.negotiate(arrow.ARROW_STREAM) == arrow.ARROW_STREAM
+    assert arrow.negotiate(f'application/json;q=0.5, {arrow.PARQUET}') == arrow.PARQUET
+    assert arrow.negotiate(f'{arrow.ARROW_STREAM};q=0.2, application/json;q=0.9') is None
+    assert arrow.negotiate(f'{arrow.ARROW_STREAM};q=0.2, {arrow.PARQUET};q=0.8') == arrow.PARQUET
+    assert arrow.negotiate(f'{arrow.ARROW_STREAM};q=0') is None
+
+
+def read_back(response):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if response.media_type == arrow.PARQUET:
+        return pq.read_table(pa.BufferReader(response.body))
+    return pa.ipc.open_stream(response.body).read_all()
+
+
+@pytest.mark.parametrize('media_type', [arrow.ARROW_STREAM, arrow.PARQUET])
+def test_dataset_table_round_trip_keeps_nulls(media_type):
+    import pyarrow as pa
+
+    columns = [
+        [2000, 2001, 2002],
+        [1.5, '-', 0.25],       # '-' is a missing value in the json responses
+        [3, 4, '-'],            # ints with a gap stay ints
+        [7],                    # shorter than the years, padded with nulls
+        ['-', '-', '-'],        # all missing
+    ]
+    table = arrow.dataset_table(columns, ['year', 'CN', 'US', 'UK', 'FR'])
+    response = arrow.table_response(table, media_type)
+    assert response.media_type == media_type
+
+    back = read_back(response)
+    assert back.column_names == ['year', 'CN', 'US', 'UK', 'FR']
+    assert back.schema.field('year').type == pa.int32()
+    assert back.schema.field('US').type == pa.int64()
+    assert back.schema.field('CN').type == pa.float64()
+    assert back.to_pydict() == {
+        'year': [2000, 2001, 2002],
+        'CN': [1.5, None, 0.25],
+        'US': [3, 4, None],
+        'UK': [7, None, None],
+        'FR': [None, None, None],
+    }
+    assert [back.column(name).null_count for name in back.column_names] == [0, 1, 1, 2, 3]
+
+
+@pytest.mark.parametrize('media_type', [arrow.ARROW_STREAM, arrow.PARQUET])
+def test_links_table_round_trip(media_type):
+    table = arrow.links_table(['CN', 'US', 'UK'], [2000, 2001], [0, 0, 1], [1, 2, 2], [0, 1, 1], [0.5, None, 0.75])
+    back = read_back(arrow.table_response(table, media_type))
+    assert back.column('source_name').to_pylist() == ['CN', 'CN', 'US']
+    assert back.column('target_name').to_pylist() == ['US', 'UK', 'UK']
+    assert back.column('year').to_pylist() == [2000, 2001, 2001]
+    assert back.column('value').to_pylist() == [0.5, None, 0.75]
+    assert back.schema.metadata[b'nodes'] == b'["CN", "US", "UK"]'
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.cache import cached
+
+
+def test_async_misses_are_coalesced():
+    calls = []
+
+    @cached(10)
+    async def get(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        return await asyncio.gather(*(get(1) for _ in range(5)), get(2))
+
+    assert asyncio.run(main()) == [2, 2, 2, 2, 2, 4]
+    assert calls == [1, 2]
+    assert get.cache.counters['coalesced'] == 4
+
+
+def test_async_exception_reaches_every_waiter_and_is_not_cached():
+    calls = []
+
+    @cached(10)
+    async def fail(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        raise ValueError(x)
+
+    async def main():
+        return await asyncio.gather(*(fail(1) for _ in range(3)), return_exceptions=True)
+
+    assert [type(e) for e in asyncio.run(main())] == [ValueError] * 3
+    assert calls == [1]
+    with pytest.raises(ValueError):
+        asyncio.run(fail(1))
+    assert calls == [1, 1]
+
+
+def test_async_cancelled_leader_does_not_cancel_waiters():
+    calls = []
+
+    @cached(10)
+    async def get(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return x * 2
+
+    async def main():
+        leader = asyncio.create_task(get(1))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(get(1)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    assert asyncio.run(main()) == [2, 2, 2]
+    # the cancelled leader, then one of the waiters took over
+    assert calls == [1, 1]
+    assert not get.cache.inflight
+
+
+def test_async_cancelled_waiter_leaves_the_leader_running():
+    @cached(10)
+    async def get(x):
+        await asyncio.sleep(0.02)
+        return x * 2
+
+    async def main():
+        leader = asyncio.create_task(get(1))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(get(1))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == 2
+
+
+def test_ttl_and_invalidate():
+    calls = []
+
+    @cached(10, ttl=0.05)
+    def get(x):
+        calls.append(x)
+        return x
+
+    get(1), get(1)
+    assert calls == [1]
+    time.sleep(0.06)
+    get(1)
+    assert calls == [1, 1]
+    assert get.cache_invalidate(1)
+    get(1)
+    assert calls == [1, 1, 1]
+    assert get.cache.counters['expirations'] == 1
+
+
+def test_lru_eviction():
+    @cached(2)
+    def get(x):
+        return x
+
+    get(1), get(2), get(1), get(3)
+    assert list(get.cache.data) == [(1,), (3,)]
+    assert get.cache.counters['evictions'] == 1
+
+
+def test_sync_misses_are_coalesced():
+    calls = []
+    started = threading.Event()
+
+    @cached(10)
+    def get(x):
+        calls.append(x)
+        started.set()
+        time.sleep(0.05)
+        return x * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(get(1)))
+    leader.start()
+    started.wait()
+    waiters = [threading.Thread(target=lambda: results.append(get(1))) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    for thread in [leader, *waiters]:
+        thread.join()
+    assert results == [2, 2, 2, 2]
+    assert calls == [1]
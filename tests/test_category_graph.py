@@ -0,0 +1,81 @@
+import asyncio
+
+from app.category_graph import CategoryGraph, lowest_common_ancestors, lowest_common_ancestors_sync
+
+#        Root
+#       /    \
+#      A      B
+#     / \    /
+#    C   D--+      D is under A and B
+#    |
+#    E
+CATEGORIES = [(1, 'Root', 'Root'), (2, 'A', 'A'), (3, 'B', 'B'), (4, 'C', 'C'), (5, 'D', 'D'), (6, 'E', 'E'), (7, 'Lone', 'Lone')]
+LINKS = [(2, 'Root'), (3, 'Root'), (4, 'A'), (5, 'A'), (5, 'B'), (6, 'C'), (6, 'Missing'), (2, 'A')]
+
+
+def graph():
+    return CategoryGraph.build(CATEGORIES, LINKS)
+
+
+def titles(g, path):
+    return [g.titles[v] for v in path]
+
+
+def test_build_skips_unknown_and_self_links():
+    g = graph()
+    assert len(g) == 7
+    assert titles(g, g.parents(g.find('A'))) == ['Root']
+    assert sorted(titles(g, g.parents(g.find('D')))) == ['A', 'B']
+    assert sorted(titles(g, g.children(g.find('Root')))) == ['A', 'B']
+    assert g.find('Missing') is None
+
+
+def test_shortest_path_is_undirected():
+    g = graph()
+    path = titles(g, g.shortest_path(g.find('E'), g.find('B')))
+    # through Root or through D, both four hops
+    assert path[:3] == ['E', 'C', 'A'] and path[3] in ('Root', 'D') and path[4] == 'B'
+    assert titles(g, g.shortest_path(g.find('C'), g.find('C'))) == ['C']
+    assert g.shortest_path(g.find('E'), g.find('Lone')) is None
+    assert g.shortest_path(g.find('E'), g.find('B'), max_depth=3) is None
+
+
+def test_line_path_only_goes_down():
+    g = graph()
+    assert titles(g, g.line_path(g.find('Root'), g.find('E'))) == ['Root', 'A', 'C', 'E']
+    assert g.line_path(g.find('E'), g.find('Root')) is None
+    assert g.line_path(g.find('B'), g.find('C')) is None
+
+
+def test_lowest_common_ancestors():
+    g = graph()
+    e, d = g.find('E'), g.find('D')
+    ancestors = lowest_common_ancestors_sync(e, d, g._expand)
+    assert [(g.titles[v], titles(g, s), titles(g, t)) for v, s, t in ancestors] == [('A', ['A', 'C', 'E'], ['A', 'D'])]
+    assert lowest_common_ancestors_sync(e, g.find('Lone'), g._expand) is None
+    assert lowest_common_ancestors_sync(e, d, g._expand, max_depth=1) is None
+
+
+def test_lowest_common_ancestors_async_expand_matches():
+    g = graph()
+
+    async def expand(frontier):
+        return g._expand(frontier)
+
+    for source, target in [('E', 'D'), ('C', 'B'), ('E', 'Lone')]:
+        s, t = g.find(source), g.find(target)
+        assert asyncio.run(lowest_common_ancestors(s, t, expand)) == lowest_common_ancestors_sync(s, t, g._expand)
+
+
+def test_distance_path():
+    g = graph()
+    result = g.distance_path('C', 'B')
+    assert [node['title'] for node in result['d1']['nodes']] == ['C', 'A', 'Root', 'B']
+    assert result['d2'] == {} and result['d3'] == {}
+    # like the neo4j version, the ancestor ends both halves
+    assert [[node['title'] for node in path['nodes']] for path in result['d4s']] == [['C', 'A', 'Root', 'Root', 'B']]
+    assert result['d4s'][0]['edges'] == [('Root', 'subcat', 'A'), ('A', 'subcat', 'C'), ('Root', 'subcat', 'B')]
+
+    assert g.distance_path('C', 'Nope') == {'d1': {}, 'd2': {}, 'd3': {}, 'd4s': None}
+    # an ancestor of the other side is not reported as a common ancestor path
+    assert g.distance_path('A', 'E')['d4s'] == []
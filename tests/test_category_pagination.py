@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.metapedia_v1 import (
+    CategoryQueryRequests, category_page_query, decode_after, encode_after, entity_titles, next_token,
+)
+
+
+def link(from_id, title=None):
+    doc = {'from': from_id, 'to': 'C', 'type': 'page'}
+    if title is not None:
+        doc['title'] = {'_id': from_id, 'title': title}
+    return doc
+
+
+def test_after_token_round_trip():
+    assert decode_after(encode_after(123456789)) == 123456789
+
+
+def test_next_token_counts_orphan_links():
+    # a full window where one member page has no page doc
+    window = [link(1, 'a'), link(2), link(5, 'c')]
+    assert entity_titles(window) == ['a', 'c']
+    assert decode_after(next_token(window, 3)) == 5
+
+
+def test_next_token_trailing_orphan():
+    window = [link(1, 'a'), link(2, 'b'), link(9)]
+    assert decode_after(next_token(window, 3)) == 9
+
+
+def test_next_token_last_page():
+    assert next_token([link(1, 'a'), link(2, 'b')], 3) is None
+    assert next_token([], 3) is None
+
+
+def test_page_numbers_past_the_first_are_rejected():
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(category_page_query(CategoryQueryRequests(lang='zh', title='C', page=5)))
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(category_page_query(CategoryQueryRequests(lang='zh', title='C', after='not a token')))
+    assert error.value.status_code == 400
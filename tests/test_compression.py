@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import compression, http_cache
+from app.compression import ENCODERS, CompressionMiddleware, negotiate
+
+
+def client():
+    app = FastAPI()
+    cacheable = http_cache.conditional('test', 'public, max-age=60')
+
+    @app.get('/big', dependencies=[cacheable])
+    async def big():
+        return {'data': list(range(2000))}
+
+    @app.get('/small', dependencies=[cacheable])
+    async def small():
+        return {'data': 1}
+
+    app.add_middleware(http_cache.HTTPCacheMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_compressed_response_and_its_304_agree():
+    c = client()
+    response = c.get('/big', headers={'accept-encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    etag = response.headers['etag']
+    assert etag.startswith('W/"')
+    assert response.headers['vary'] == 'Accept, Accept-Encoding'
+
+    not_modified = c.get('/big', headers={'accept-encoding': 'gzip', 'if-none-match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == etag
+    assert not_modified.headers['vary'] == 'Accept, Accept-Encoding'
+    assert 'content-encoding' not in not_modified.headers
+
+
+def test_small_response_gets_the_same_etag_as_a_compressed_one():
+    c = client()
+    response = c.get('/small', headers={'accept-encoding': 'gzip'})
+    assert 'content-encoding' not in response.headers
+    assert response.headers['etag'].startswith('W/"')
+    assert response.headers['vary'] == 'Accept, Accept-Encoding'
+
+
+def test_identity_keeps_the_strong_etag():
+    c = client()
+    response = c.get('/big', headers={'accept-encoding': 'identity'})
+    assert 'content-encoding' not in response.headers
+    etag = response.headers['etag']
+    assert etag.startswith('"')
+    not_modified = c.get('/big', headers={'accept-encoding': 'identity', 'if-none-match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == etag
+
+
+def test_negotiate_follows_q_values():
+    assert negotiate('gzip') == 'gzip'
+    assert negotiate('gzip;q=0') is None
+    assert negotiate('') is None
+    assert negotiate('identity, gzip;q=0.5') is None
+    assert negotiate('br;q=0, *;q=0.1') in ENCODERS
+
+
+def test_negotiate_q_beats_server_preference():
+    if 'zstd' not in ENCODERS:
+        pytest.skip('zstandard is not installed')
+    assert negotiate('gzip;q=1, zstd;q=0.1') == 'gzip'
+    assert negotiate('gzip, zstd') == 'zstd'
+    assert negotiate('GZIP;q=0.5, zstd;q=0.6') == 'zstd'
+    assert negotiate('gzip;q=0.5, *') == 'zstd'
+
+
+def test_unmatched_paths_share_one_stats_entry():
+    c = client()
+    for path in ['/nope', '/wp-login.php', '/big/extra']:
+        assert c.get(path, headers={'accept-encoding': 'gzip'}).status_code == 404
+    assert compression.UNMATCHED in compression.stats
+    assert not {'/nope', '/wp-login.php', '/big/extra'} & set(compression.stats)
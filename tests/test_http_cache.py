@@ -0,0 +1,34 @@
+import asyncio
+
+from app import config, distance_store, http_cache, works_cube
+
+
+def test_matches_uses_weak_comparison():
+    assert http_cache._matches('"a"', '"a"')
+    assert http_cache._matches('W/"a"', '"a"')
+    assert http_cache._matches('"b", W/"a"', 'W/"a"')
+    assert http_cache._matches('*', 'W/"a"')
+    assert not http_cache._matches('"b"', 'W/"a"')
+
+
+def test_mongo_backed_datasets(monkeypatch):
+    assert http_cache.mongo_collections('metapedia')
+    monkeypatch.setattr(distance_store, 'store', object())
+    monkeypatch.setattr(works_cube, 'cube', None)
+    assert http_cache.mongo_collections('openalex') == [('openalex', 'works_count_by_country')]
+    assert http_cache.mongo_collections('other') == []
+
+
+def test_dataset_version_mixes_in_mongo(monkeypatch):
+    async def mongo_version(dataset):
+        return 'm1'
+
+    monkeypatch.setattr(http_cache, 'mongo_version', mongo_version)
+    monkeypatch.setitem(http_cache.versions, 'metapedia', 's1')
+    monkeypatch.setitem(http_cache.versions, 'other', 's2')
+    assert asyncio.run(http_cache.dataset_version('metapedia')) == ('s1-m1', True)
+    assert asyncio.run(http_cache.dataset_version('other')) == ('s2', False)
+    # a pinned version is used as it is
+    monkeypatch.setitem(config.DATASET_VERSIONS, 'metapedia', 'pinned')
+    monkeypatch.setitem(http_cache.versions, 'metapedia', 'pinned')
+    assert asyncio.run(http_cache.dataset_version('metapedia')) == ('pinned', True)
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from app import jobs
+
+
+class Collection:
+    def __init__(self):
+        self.docs = []
+
+    def find(self, query=None, *args, **kwargs):
+        query = query or {}
+        return [doc for doc in self.docs if all(doc.get(k) == v for k, v in query.items())]
+
+    def insert_many(self, docs, ordered=True):
+        self.docs += docs
+
+
+class Client:
+    """in-memory stand-in for a pymongo client, one per uri like the real ones"""
+    databases = {}
+
+    def __init__(self, uri: str):
+        self.uri = uri
+
+    def get_database(self, name: str):
+        return self.databases.setdefault((self.uri, name), {})
+
+
+def collection(uri: str, database: str, name: str) -> Collection:
+    return Client(uri).get_database(database).setdefault(name, Collection())
+
+
+class Interrupted(Exception):
+    pass
+
+
+class Squares(jobs.Job):
+    """squares of source.numbers, one partition per range of ten"""
+    name = 'squares'
+    client_factory = Client
+    # partition -> times run, and the partition to fail on
+    runs = {}
+    fail_on = None
+
+    def partitions(self) -> list:
+        return [[start, start + 10] for start in range(0, self.options['n'], 10)]
+
+    def run_partition(self, partition) -> dict:
+        start, end = partition
+        Squares.runs[start] = Squares.runs.get(start, 0) + 1
+        if partition == Squares.fail_on:
+            raise Interrupted(partition)
+        numbers = [doc['n'] for doc in self.source('source')['numbers'].find() if start <= doc['n'] < end]
+        self.dest('dest').setdefault('squares', Collection()).insert_many([{'n': n, 'square': n * n} for n in numbers])
+        return {'read': len(numbers), 'written': len(numbers)}
+
+
+@pytest.fixture
+def job(monkeypatch):
+    monkeypatch.setattr(jobs, '_clients', {})
+    monkeypatch.setattr(Client, 'databases', {})
+    monkeypatch.setattr(Squares, 'runs', {})
+    monkeypatch.setattr(Squares, 'fail_on', None)
+    collection('src', 'source', 'numbers').insert_many([{'n': n} for n in range(50)])
+    return Squares('src', 'dst', n=50)
+
+
+def squares():
+    return sorted(doc['n'] for doc in collection('dst', 'dest', 'squares').docs)
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(job, tmp_path):
+    path = str(tmp_path / 'squares.json')
+    Squares.fail_on = [30, 40]
+    with pytest.raises(Interrupted):
+        jobs.run(job, checkpoint_path=path)
+    with open(path) as f:
+        assert sorted(json.load(f)['done']) == ['[0, 10]', '[10, 20]', '[20, 30]']
+    assert squares() == list(range(30))
+
+    Squares.fail_on = None
+    progress = jobs.run(job, checkpoint_path=path)
+    # the finished partitions are not run again
+    assert Squares.runs == {0: 1, 10: 1, 20: 1, 30: 2, 40: 1}
+    assert (progress.total, progress.skipped, progress.read) == (5, 3, 20)
+    assert squares() == list(range(50))
+
+    # nothing left to do
+    assert jobs.run(job, checkpoint_path=path).skipped == 5
+    assert Squares.runs == {0: 1, 10: 1, 20: 1, 30: 2, 40: 1}
+
+
+def test_restart_and_other_options_ignore_the_checkpoint(job, tmp_path):
+    path = str(tmp_path / 'squares.json')
+    jobs.run(job, checkpoint_path=path)
+    assert jobs.run(job, checkpoint_path=path, restart=True).skipped == 0
+    # the partitions of other options mean something else
+    other = Squares('src', 'dst', n=30)
+    assert jobs.run(other, checkpoint_path=path).skipped == 0
+    assert Squares.runs == {0: 3, 10: 3, 20: 3, 30: 2, 40: 2}
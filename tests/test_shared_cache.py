@@ -0,0 +1,67 @@
+import asyncio
+
+from app import shared_cache
+from app.shared_cache import SQLiteBackend
+
+
+def backend(tmp_path, max_bytes=10**6):
+    return SQLiteBackend(str(tmp_path / 'cache.sqlite'), max_bytes)
+
+
+def test_set_get_and_clear(tmp_path):
+    cache = backend(tmp_path)
+
+    async def main():
+        await cache.set('metapedia:a', b'1')
+        await cache.set('metapedia:b', b'22', expire=60)
+        await cache.set('other:a', b'333')
+        assert await cache.get('metapedia:a') == b'1'
+        assert await cache.get_with_ttl('metapedia:a') == (-1, b'1')
+        ttl, value = await cache.get_with_ttl('metapedia:b')
+        assert value == b'22' and 58 <= ttl <= 60
+        assert await cache.get('missing') is None
+        assert await cache.clear(namespace='metapedia') == 2
+        assert await cache.get('metapedia:b') is None
+        assert await cache.get('other:a') == b'333'
+
+    asyncio.run(main())
+    assert cache.stats()['entries'] == 1
+
+
+def test_ttl_expiry(tmp_path, monkeypatch):
+    cache = backend(tmp_path)
+    now = shared_cache.time.time()
+    cache._set('k', b'value', 10)
+    assert cache._get('k')[1] == b'value'
+    monkeypatch.setattr(shared_cache.time, 'time', lambda: now + 11)
+    assert cache._get('k') == (0, None)
+    assert cache.stats()['entries'] == 0
+
+
+def test_eviction_keeps_the_recently_read_under_budget(tmp_path, monkeypatch):
+    cache = backend(tmp_path, max_bytes=1000)
+    clock = [1000.0]
+    monkeypatch.setattr(shared_cache.time, 'time', lambda: clock[0])
+    for i in range(5):
+        clock[0] += 100
+        cache._set(f'k{i}', bytes(200), None)
+    # at the budget, nothing evicted yet; reading k0 makes it the most recent
+    assert cache.stats()['entries'] == 5
+    clock[0] += 100
+    cache._get('k0')
+    clock[0] += 100
+    cache._set('k5', bytes(200), None)
+    # down to 90% of the budget, the least recently read go first
+    assert cache.stats()['bytes'] == 800
+    assert [key for key in ['k0', 'k1', 'k2', 'k3', 'k4', 'k5'] if cache._get(key)[1] is not None] == ['k0', 'k3', 'k4', 'k5']
+
+
+def test_total_is_not_summed_on_every_write(tmp_path):
+    cache = backend(tmp_path)
+    scans = []
+    cache.conn.set_trace_callback(lambda sql: scans.append(sql) if 'total(size)' in sql else None)
+    for i in range(250):
+        cache._set(f'k{i % 50}', bytes(i % 7 + 1), None)
+    # the first write and every sync_interval writes after it
+    assert len(scans) == 3
+    assert cache.total == cache.stats()['bytes']
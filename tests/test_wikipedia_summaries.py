@@ -0,0 +1,121 @@
+import asyncio
+import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import config
+from app.routers import wikipedia
+
+API_URL = 'http://mediawiki.test/{lang}/w/api.php'
+CONCURRENCY = 2
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+class Collection:
+    """the few calls of {lang}_summary the summary routes make, recorded"""
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.calls = []
+
+    def find(self, query, *args, **kwargs):
+        self.calls.append(('find', query))
+        return Cursor([doc for doc in self.docs if doc['title'] in query['title']['$in']])
+
+    async def find_one(self, query, *args, **kwargs):
+        self.calls.append(('find_one', query))
+        return next((doc for doc in self.docs if doc['title'] == query['title']), None)
+
+    async def insert_one(self, doc):
+        self.calls.append(('insert_one', [doc]))
+        self.docs.append(doc)
+
+    async def insert_many(self, docs):
+        self.calls.append(('insert_many', list(docs)))
+        self.docs += docs
+
+
+class MediaWiki:
+    """action=query&prop=extracts stand-in, counts the requests it serves at once"""
+    def __init__(self):
+        self.titles = []
+        self.active = self.peak = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.host == 'mediawiki.test' and request.url.path == '/zh/w/api.php'
+        title = request.url.params['titles']
+        self.titles.append(title)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        return httpx.Response(200, json={'query': {'pages': [{'title': title, 'extract': f'{title} summary'}]}})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    mediawiki = MediaWiki()
+    collection = Collection([{'title': 'stored', 'date': datetime.datetime.now(), 'summary': 'stored summary', 'ok': True}])
+    monkeypatch.setattr(config, 'WIKIPEDIA_API_URL', API_URL)
+    monkeypatch.setattr(config, 'WIKIPEDIA_CONCURRENCY', CONCURRENCY)
+    monkeypatch.setitem(wikipedia.summary_collections, 'zh', collection)
+    monkeypatch.setattr(wikipedia, 'http_client', httpx.AsyncClient(transport=httpx.MockTransport(mediawiki)))
+    monkeypatch.setattr(wikipedia, 'upstream_limit', asyncio.Semaphore(config.WIKIPEDIA_CONCURRENCY))
+    wikipedia.get_title.cache_clear()
+    yield mediawiki, collection
+    wikipedia.get_title.cache_clear()
+
+
+def test_get_titles_one_query_bounded_fetches_one_insert(upstream):
+    mediawiki, collection = upstream
+    titles = ['stored', 'b', 'c', 'd', 'e', 'b']
+    ret = asyncio.run(wikipedia.get_titles(titles, 'zh'))
+
+    assert ret == {'stored': 'stored summary', **{t: f'{t} summary' for t in 'bcde'}}
+    # one $in for every title not in the process cache, the stored one is not fetched
+    assert collection.calls[0] == ('find', {'title': {'$in': ['stored', 'b', 'c', 'd', 'e']}})
+    assert sorted(mediawiki.titles) == ['b', 'c', 'd', 'e']
+    assert mediawiki.peak == CONCURRENCY
+    assert [(op, [doc['title'] for doc in docs]) for op, docs in collection.calls[1:]] == [('insert_many', ['b', 'c', 'd', 'e'])]
+
+    # served from the process cache now
+    assert asyncio.run(wikipedia.get_titles(['b', 'stored'], 'zh')) == {'b': 'b summary', 'stored': 'stored summary'}
+    assert len(collection.calls) == 2
+
+
+def test_get_titles_joins_lookups_in_flight(upstream):
+    mediawiki, collection = upstream
+
+    async def main():
+        return await asyncio.gather(
+            wikipedia.get_title('x', 'zh'),
+            wikipedia.get_titles(['x', 'y'], 'zh'),
+            wikipedia.get_titles(['y', 'z'], 'zh'),
+        )
+
+    assert asyncio.run(main()) == ['x summary', {'x': 'x summary', 'y': 'y summary'}, {'y': 'y summary', 'z': 'z summary'}]
+    assert sorted(mediawiki.titles) == ['x', 'y', 'z']
+    assert not wikipedia.get_title.cache.inflight
+
+
+def test_summaries_route(upstream):
+    mediawiki, collection = upstream
+    app = FastAPI()
+    app.include_router(wikipedia.router)
+    response = TestClient(app).post('/wikipedia/summaries', json={'lang': 'zh', 'titles': ['stored', 'b']})
+    assert response.status_code == 200
+    assert response.json() == {'stored': 'stored summary', 'b': 'b summary'}
+    assert mediawiki.titles == ['b']
@@ -0,0 +1,18 @@
+import datetime
+
+from app import config
+from app.wikipedia_summary import clean_summary, is_fresh
+
+
+def test_clean_summary():
+    assert clean_summary('Wuzhen () is a town', 'en') == 'Wuzhen  is a town'
+    assert clean_summary('烏鎮（）', 'zh') == '乌镇'
+
+
+def test_is_fresh():
+    now = datetime.datetime.now()
+    old = now - datetime.timedelta(seconds=config.WIKIPEDIA_NEGATIVE_TTL + 1)
+    assert is_fresh({'summary': 'text', 'date': old})
+    assert not is_fresh({'summary': '', 'ok': True, 'date': old})
+    assert not is_fresh({'summary': 'text', 'ok': False, 'date': old})
+    assert is_fresh({'summary': '', 'ok': False, 'date': now})
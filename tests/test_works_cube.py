@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.works_cube import WorksCube
+
+DOCS = [
+    {'n': 'CN', 't': 'article', 'y': 2000, 'c': 5},
+    {'n': 'CN', 't': 'book', 'y': 2001, 'c': 2},
+    {'n': 'CN', 't': '', 'y': 2002, 'c': 1},
+    {'n': 'US', 't': 'article', 'y': 2002, 'c': 7},
+    {'n': None, 't': 'article', 'y': 2001, 'c': 3},
+]
+
+
+class Collection:
+    def find(self, *args, **kwargs):
+        return iter(DOCS)
+
+
+class Database:
+    works_count_by_country = Collection()
+
+
+def reference(country, type_names, year_start, year_end):
+    """what the mongo fallback of /countryworkscount sums"""
+    ret = [0] * (year_end - year_start + 1)
+    for doc in DOCS:
+        if doc['n'] == country and doc['t'] in type_names and year_start <= doc['y'] <= year_end:
+            ret[doc['y'] - year_start] += doc['c']
+    return ret
+
+
+def test_build_indexes_countries_types_and_years():
+    cube = WorksCube.build_from_mongo(Database())
+    assert cube.countries == [None, 'CN', 'US']
+    assert cube.types == ['', 'article', 'book']
+    assert (cube.start_year, cube.end_year) == (2000, 2002)
+    assert cube.counts.shape == (3, 3, 3)
+    assert cube.counts[cube.country_index['CN'], cube.type_index['book'], 1] == 2
+
+
+def test_works_count_matches_the_mongo_sums():
+    cube = WorksCube.build_from_mongo(Database())
+    countries = ['US', None, 'CN', 'XX']
+    for type_names in [('article',), ('article', 'book', ''), ('',), ('unknown',)]:
+        for year_start, year_end in [(2000, 2002), (1998, 2004), (2001, 2001), (2005, 2006)]:
+            counts = cube.works_count(countries, type_names, year_start, year_end)
+            assert counts.tolist() == [reference(c, type_names, year_start, year_end) for c in countries]
+
+
+def test_save_load_round_trip(tmp_path):
+    cube = WorksCube.build_from_mongo(Database())
+    cube.save(str(tmp_path / 'cube'))
+    loaded = WorksCube.load(str(tmp_path / 'cube'))
+    assert loaded.countries == cube.countries and loaded.types == cube.types
+    assert np.array_equal(loaded.counts, cube.counts)